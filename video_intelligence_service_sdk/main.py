@@ -2,13 +2,34 @@ import os
 import sys
 import argparse
 from config import *
-from utils.transcription import transcribe_video_to_vtt
+from utils.live_transcription import live_output_name
+from utils.admission import transcribe_with_admission, transcribe_live_with_admission, run_with_admission
+from utils.batched_transcription import transcribe_videos_batched, benchmark_batch_sizes
+from utils.frame_analysis import extract_keyframes, get_video_duration
+from utils.clip_export import export_chapter_clips
 from utils.json_processing import vtt_to_json, save_json, load_json
 from utils.summarization import initialize_gemini, generate_summary
+from utils.summary_cache import get_cache_stats
+from utils.fake_gemini import run_summary_load_test
+from utils.prompt_variants import run_prompt_variants
+from utils.job_queue import open_job_queue
+from utils.worker import STAGES, enqueue_videos, run_worker
 
 def main():
     # Check for command line arguments
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "enqueue":
+        run_enqueue_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == "worker":
+        run_worker_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == "clips":
+        run_clips_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == "loadtest":
+        run_load_test_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == "variants":
+        run_variants_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == "batch":
+        run_batch_transcription_mode()
+    elif len(sys.argv) > 1:
         run_from_command_line()
     else:
         run_interactive_mode()
@@ -17,6 +38,14 @@ def run_from_command_line():
     """Run the full pipeline from command line arguments"""
     parser = argparse.ArgumentParser(description='AG Video Intelligence Service')
     parser.add_argument('video_path', help='Path to the video file')
+    parser.add_argument('--live', action='store_true',
+                        help='Follow a recording that is still being written (or a stream URL) and caption it live')
+    parser.add_argument('--name', help='Base name for output files (defaults to the video file name)')
+    parser.add_argument('--scenes', action='store_true',
+                        help='Detect scene/slide changes from video frames and use them for chapters and keyframes')
+    parser.add_argument('--clips', action='store_true', help='Export one MP4 clip per summary chapter')
+    parser.add_argument('--frame-accurate', action='store_true',
+                        help='Re-encode clips for exact cuts instead of stream copy at keyframes')
     
     args = parser.parse_args()
     video_file = args.video_path
@@ -25,44 +54,85 @@ def run_from_command_line():
     print("=" * 50)
     
     # Check for Gemini API key
-    if not GEMINI_API_KEY:
+    if not GEMINI_API_KEY and GEMINI_BACKEND == 'gemini':
         print("❌ Please set GOOGLE_API_KEY_1 in your .env file")
         sys.exit(1)
     
-    if not os.path.exists(video_file):
+    if not args.live and not os.path.exists(video_file):
         print(f"❌ File not found: {video_file}")
         sys.exit(1)
     
     try:
-        # Step 1: Transcribe
-        print("🔄 Step 1/4: Transcribing MP4 to VTT...")
-        base_name = os.path.splitext(os.path.basename(video_file))[0]
+        if args.name:
+            base_name = args.name
+        elif args.live:
+            base_name = live_output_name(video_file)
+        else:
+            base_name = os.path.splitext(os.path.basename(video_file))[0]
         vtt_file = os.path.join(OUTPUT_FOLDER, base_name + ".vtt")
-        transcribe_video_to_vtt(video_file, vtt_file, WHISPER_MODEL_SIZE)
-        print(f"✅ Transcription complete: {vtt_file}")
-        
-        # Step 2: Convert to JSON
-        print("🔄 Step 2/4: Converting VTT to JSON...")
         json_file = os.path.join(OUTPUT_FOLDER, base_name + ".json")
-        json_data = vtt_to_json(vtt_file)
-        save_json(json_data, json_file)
-        print(f"✅ Conversion complete: {json_file}")
+
+        if args.live:
+            # Steps 1-2 happen together: cues are appended to VTT and JSON as they stabilize
+            print("🔄 Step 1-2/4: Live transcription to VTT and JSON...")
+            if not transcribe_live_with_admission(video_file, vtt_file, json_file):
+                raise RuntimeError("live transcription")
+            json_data = load_json(json_file)
+            print(f"✅ Live transcription complete: {vtt_file}")
+        else:
+            # Step 1: Transcribe
+            print("🔄 Step 1/4: Transcribing MP4 to VTT...")
+            transcribe_with_admission(video_file, vtt_file)
+            print(f"✅ Transcription complete: {vtt_file}")
+            
+            # Step 2: Convert to JSON
+            print("🔄 Step 2/4: Converting VTT to JSON...")
+            json_data = vtt_to_json(vtt_file)
+            save_json(json_data, json_file)
+            print(f"✅ Conversion complete: {json_file}")
+        
+        # Optional: visual scene analysis feeding the summary
+        scenes = None
+        if args.scenes and not os.path.isfile(video_file):
+            print(f"⚠️ Skipping scene analysis: {video_file} is not a local file")
+        elif args.scenes:
+            print("🔄 Analyzing video frames for scene changes...")
+            frames_dir = os.path.join(OUTPUT_FOLDER, f"keyframes_{base_name}")
+            scene_data = extract_keyframes(video_file, frames_dir, FRAME_SAMPLE_FPS, FRAME_ANALYSIS_SIZE,
+                                           SCENE_CHANGE_THRESHOLD, MIN_SCENE_SECONDS, FRAME_ANALYSIS_WORKERS)
+            if scene_data:
+                scenes_file = os.path.join(OUTPUT_FOLDER, f"scenes_{base_name}.json")
+                save_json(scene_data, scenes_file)
+                scenes = scene_data["scenes"]
         
         # Step 3: Generate Summary
         print("🔄 Step 3/4: Generating summary...")
         model = initialize_gemini(GEMINI_API_KEY)
-        summary = generate_summary(json_data, model, GEMINI_API_KEY)
+        summary = generate_summary(json_data, model, GEMINI_API_KEY, scenes)
         
         # Step 4: Save final summary
         print("🔄 Step 4/4: Saving results...")
         summary_file = os.path.join(OUTPUT_FOLDER, f"summary_{base_name}.json")
         save_json(summary, summary_file)
         
+        # Optional: per-chapter clips
+        clips_dir = None
+        if args.clips:
+            clips_dir = os.path.join(OUTPUT_FOLDER, f"clips_{base_name}")
+            if not export_chapter_clips(video_file, summary, clips_dir,
+                                        args.frame_accurate or CLIP_FRAME_ACCURATE, CLIP_EXPORT_WORKERS, json_file):
+                raise RuntimeError(f"clip export (summary already saved to {summary_file})")
+        
         print(f"\n🎉 All 4 steps completed successfully!")
         print(f"📁 Output files:")
         print(f"   • VTT: {vtt_file}")
         print(f"   • Transcript JSON: {json_file}")
+        if scenes:
+            print(f"   • Scenes JSON: {scenes_file}")
         print(f"   • Summary JSON: {summary_file}")
+        if clips_dir:
+            print(f"   • Chapter clips: {clips_dir}")
+        print(f"📊 Cache stats: {get_cache_stats()}")
         
         sys.exit(0)  # Success exit
         
@@ -72,13 +142,158 @@ def run_from_command_line():
         traceback.print_exc()
         sys.exit(1)  # Error exit
 
+def run_enqueue_mode():
+    """Add videos to the shared job queue for workers to process"""
+    parser = argparse.ArgumentParser(prog='main.py enqueue', description='Queue videos for worker nodes')
+    parser.add_argument('video_paths', nargs='+', help='Video files (must be reachable from transcribe workers)')
+    parser.add_argument('--queue', default=JOB_QUEUE_URL, help='Job queue URL')
+    
+    args = parser.parse_args(sys.argv[2:])
+    queue = open_job_queue(args.queue)
+    enqueue_videos(queue, args.video_paths, JOB_MAX_ATTEMPTS)
+    print(f"📊 Queue status: {queue.stats()}")
+
+def run_worker_mode():
+    """Pull jobs from the shared job queue until stopped"""
+    parser = argparse.ArgumentParser(prog='main.py worker', description='Process queued jobs')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help='Comma-separated stages this node runs, e.g. "transcribe" on CPU-heavy nodes')
+    parser.add_argument('--queue', default=JOB_QUEUE_URL, help='Job queue URL')
+    parser.add_argument('--exit-when-idle', action='store_true', help='Stop once no job is available')
+    
+    args = parser.parse_args(sys.argv[2:])
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    if 'summarize' in stages and not GEMINI_API_KEY and GEMINI_BACKEND == 'gemini':
+        print("❌ Please set GOOGLE_API_KEY_1 in your .env file")
+        sys.exit(1)
+    
+    queue = open_job_queue(args.queue)
+    try:
+        run_worker(queue, stages, lease_seconds=JOB_LEASE_SECONDS, poll_seconds=WORKER_POLL_SECONDS,
+                   exit_when_idle=args.exit_when_idle)
+    except KeyboardInterrupt:
+        print("\n👋 Worker stopped; unfinished jobs will be picked up by other workers")
+
+def run_clips_mode():
+    """Cut chapter clips for an existing summary"""
+    parser = argparse.ArgumentParser(prog='main.py clips', description='Export one clip per summary chapter')
+    parser.add_argument('video_path', help='Source video file')
+    parser.add_argument('summary_json', help='Summary JSON with summary_data.chapters')
+    parser.add_argument('--transcript', help='Transcript JSON whose text is added per clip (default: outputs/<video>.json)')
+    parser.add_argument('--frame-accurate', action='store_true',
+                        help='Re-encode clips for exact cuts instead of stream copy at keyframes')
+    
+    args = parser.parse_args(sys.argv[2:])
+    base_name = os.path.splitext(os.path.basename(args.video_path))[0]
+    clips_dir = os.path.join(OUTPUT_FOLDER, f"clips_{base_name}")
+    transcript_file = args.transcript or os.path.join(OUTPUT_FOLDER, base_name + ".json")
+    try:
+        manifest = export_chapter_clips(args.video_path, load_json(args.summary_json), clips_dir,
+                                        args.frame_accurate or CLIP_FRAME_ACCURATE, CLIP_EXPORT_WORKERS,
+                                        transcript_file)
+    except Exception as e:
+        print(f"❌ Clip export failed: {e}")
+        sys.exit(1)
+    sys.exit(0 if manifest else 1)
+
+def run_load_test_mode():
+    """Measure summary throughput and error handling against the configured Gemini backend"""
+    import config
+    parser = argparse.ArgumentParser(prog='main.py loadtest', description='Summary load test')
+    parser.add_argument('transcripts', nargs='+', help='Transcript JSON files to summarize')
+    parser.add_argument('--jobs', type=int, default=20, help='Total summaries to generate')
+    parser.add_argument('--concurrency', type=int, default=4, help='Summaries in flight at once')
+    parser.add_argument('--use-cache', action='store_true', help='Allow summary cache hits')
+    
+    args = parser.parse_args(sys.argv[2:])
+    if GEMINI_BACKEND == 'gemini':
+        print("⚠️ GEMINI_BACKEND is 'gemini': this load test spends real API quota")
+    config.SUMMARY_CACHE_ENABLED = args.use_cache
+    
+    transcripts = [load_json(path) for path in args.transcripts]
+    run_summary_load_test(initialize_gemini(GEMINI_API_KEY), transcripts, args.jobs, args.concurrency)
+
+def run_variants_mode():
+    """Run several prompt variants over existing transcripts and store the results side by side"""
+    parser = argparse.ArgumentParser(prog='main.py variants', description='Compare prompt variants')
+    parser.add_argument('transcripts', nargs='+', help='Transcript JSON files (one or a whole catalog)')
+    parser.add_argument('--variants', default=','.join(PROMPT_VARIANTS),
+                        help=f"Comma-separated variant names from PROMPT_VARIANTS ({', '.join(PROMPT_VARIANTS)})")
+    
+    args = parser.parse_args(sys.argv[2:])
+    names = [name.strip() for name in args.variants.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PROMPT_VARIANTS]
+    if unknown:
+        print(f"❌ Unknown variant(s): {', '.join(unknown)}")
+        sys.exit(1)
+    if not GEMINI_API_KEY and GEMINI_BACKEND == 'gemini':
+        print("❌ Please set GOOGLE_API_KEY_1 in your .env file")
+        sys.exit(1)
+    
+    variants = {name: PROMPT_VARIANTS[name] for name in names}
+    for transcript_file in args.transcripts:
+        base_name = os.path.splitext(os.path.basename(transcript_file))[0]
+        output_dir = os.path.join(OUTPUT_FOLDER, f"variants_{base_name}")
+        run_prompt_variants(load_json(transcript_file), variants, GEMINI_API_KEY, output_dir,
+                            max_concurrency=VARIANT_CONCURRENCY)
+
+def run_batch_transcription_mode():
+    """Transcribe several videos with batched decoding in one loaded model"""
+    parser = argparse.ArgumentParser(prog='main.py batch', description='Batched transcription (MP4 → VTT → JSON)')
+    parser.add_argument('video_paths', nargs='+', help='Video files to transcribe')
+    parser.add_argument('--batch-size', type=int, default=TRANSCRIBE_BATCH_SIZE, help='Speech chunks per forward pass')
+    parser.add_argument('--concurrent-videos', type=int, default=TRANSCRIBE_CONCURRENT_VIDEOS,
+                        help='Videos decoded at once on the shared model')
+    parser.add_argument('--benchmark', help='Comma-separated batch sizes to compare, e.g. "1,4,8,16"')
+    
+    args = parser.parse_args(sys.argv[2:])
+    missing = [path for path in args.video_paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ File not found: {', '.join(missing)}")
+        sys.exit(1)
+    
+    if args.benchmark:
+        batch_sizes = [int(size) for size in args.benchmark.split(',') if size.strip()]
+        results = benchmark_batch_sizes(args.video_paths, WHISPER_MODEL_SIZE, batch_sizes, args.concurrent_videos)
+        if not results:
+            sys.exit(1)
+        save_json({"model_size": WHISPER_MODEL_SIZE, "concurrent_videos": args.concurrent_videos,
+                   "videos": args.video_paths, "results": results},
+                  os.path.join(OUTPUT_FOLDER, "batch_benchmark_report.json"))
+        sys.exit(0)
+    
+    base_names = [os.path.splitext(os.path.basename(path))[0] for path in args.video_paths]
+    vtt_files = [os.path.join(OUTPUT_FOLDER, name + ".vtt") for name in base_names]
+    
+    # Reserve for the longest videos that can be decoded at the same time
+    audio_seconds = 0.0
+    if ADMISSION_CONTROL_ENABLED:
+        durations = sorted((get_video_duration(path) for path in args.video_paths), reverse=True)
+        audio_seconds = sum(durations[:args.concurrent_videos])
+    report = run_with_admission(
+        lambda model_size: transcribe_videos_batched(args.video_paths, vtt_files, model_size,
+                                                     args.batch_size, args.concurrent_videos),
+        audio_seconds
+    )
+    if not report:
+        sys.exit(1)
+    
+    for name, vtt_file in zip(base_names, vtt_files):
+        save_json(vtt_to_json(vtt_file), os.path.join(OUTPUT_FOLDER, name + ".json"))
+    save_json(report, os.path.join(OUTPUT_FOLDER, "batch_transcription_report.json"))
+    sys.exit(0)
+
 def run_interactive_mode():
     """Run the interactive menu mode"""
     print("🎥 AG Video Intelligence Service - Interactive Mode")
     print("=" * 50)
     
     # Check for Gemini API key
-    if not GEMINI_API_KEY:
+    if not GEMINI_API_KEY and GEMINI_BACKEND == 'gemini':
         print("❌ Please set GOOGLE_API_KEY_1 in your .env file")
         return
     
@@ -117,7 +332,7 @@ def transcribe_mp4():
     output_vtt = os.path.join(OUTPUT_FOLDER, os.path.splitext(os.path.basename(video_file))[0] + ".vtt")
     
     try:
-        transcribe_video_to_vtt(video_file, output_vtt, WHISPER_MODEL_SIZE)
+        transcribe_with_admission(video_file, output_vtt)
         print(f"✅ Transcription complete: {output_vtt}")
     except Exception as e:
         print(f"❌ Transcription failed: {e}")
@@ -178,7 +393,7 @@ def full_pipeline():
         print("🔄 Step 1/3: Transcribing MP4 to VTT...")
         base_name = os.path.splitext(os.path.basename(video_file))[0]
         vtt_file = os.path.join(OUTPUT_FOLDER, base_name + ".vtt")
-        transcribe_video_to_vtt(video_file, vtt_file, WHISPER_MODEL_SIZE)
+        transcribe_with_admission(video_file, vtt_file)
         
         # Step 2: Convert to JSON
         print("🔄 Step 2/3: Converting VTT to JSON...")
@@ -0,0 +1,72 @@
+import os
+import types
+import pytest
+import utils.admission as admission
+from utils.admission import (estimate_job_memory, _downgrade_candidates, reserve_transcription_memory,
+                             memory_headroom_gb, _load_ledger, _save_ledger, _state_paths, GB)
+
+@pytest.fixture
+def node(monkeypatch):
+    """A node with a fixed amount of free RAM and a controllable RSS per process"""
+    state = {"available_gb": 4.0, "rss_gb": {}}
+    monkeypatch.setattr(admission.psutil, "virtual_memory",
+                        lambda: types.SimpleNamespace(available=state["available_gb"] * GB))
+    monkeypatch.setattr(admission, "_process_rss_gb", lambda pid: state["rss_gb"].get(pid, 0.0))
+    return state
+
+def test_estimate_scales_with_audio_and_learned_ratio():
+    base = estimate_job_memory("small", 0)
+    assert estimate_job_memory("small", 3600) > base
+    assert estimate_job_memory("small", 0, {"small": {"ratio": 2.0}}) == pytest.approx(base * 2)
+    assert estimate_job_memory("small", 0, {"small": {"ratio": 10.0}}) == pytest.approx(base * 3.0)  # clamped
+    assert estimate_job_memory("small", 0, {"small": {"ratio": 0.1}}) == pytest.approx(base * 0.5)
+
+def test_downgrade_candidates():
+    assert _downgrade_candidates("medium", True) == ["medium", "small", "base", "tiny"]
+    assert _downgrade_candidates("large-v3", True) == ["large-v3", "medium", "small", "base", "tiny"]
+    assert _downgrade_candidates("medium", False) == ["medium"]
+    assert _downgrade_candidates("distil-small.en", True) == ["distil-small.en"]
+
+def test_admit_downgrade_and_release(node, tmp_path):
+    state_file, _ = _state_paths(str(tmp_path))
+    node["available_gb"] = 2.5
+    reservation = reserve_transcription_memory("medium", 60, safety_gb=0.5, state_dir=str(tmp_path),
+                                               max_wait_seconds=0)
+    assert reservation.model_size == "small"  # medium (~2.9 GB) does not fit in 2 GB of headroom
+    ledger = _load_ledger(state_file)
+    assert list(ledger["reservations"]) == [reservation.job_id] and ledger["waiting"] == {}
+
+    # The reservation is still untouched, so a second job has no room left
+    with pytest.raises(MemoryError):
+        reserve_transcription_memory("small", 60, safety_gb=0.5, allow_downgrade=False,
+                                     state_dir=str(tmp_path), max_wait_seconds=0)
+    assert _load_ledger(state_file)["waiting"] == {}
+
+    reservation.release()
+    ledger = _load_ledger(state_file)
+    assert ledger["reservations"] == {} and ledger["history"]["small"]["jobs"] == 1
+
+def test_headroom_counts_only_growth_above_baseline(node):
+    pid = os.getpid()
+    ledger = {"reservations": {"a": {"pid": pid, "gb": 2.0, "baseline_gb": 1.0},
+                               "b": {"pid": pid, "gb": 1.0, "baseline_gb": 1.5}}, "waiting": {}}
+    node["rss_gb"][pid] = 1.0  # nothing loaded yet: all 3 GB still pending
+    assert memory_headroom_gb(ledger, 0.0) == pytest.approx(1.0)
+    node["rss_gb"][pid] = 2.5  # grew 1.5 GB above the earliest baseline
+    assert memory_headroom_gb(ledger, 0.0) == pytest.approx(2.5)
+
+def test_waiters_are_admitted_in_arrival_order(node, tmp_path):
+    state_file, _ = _state_paths(str(tmp_path))
+    ledger = _load_ledger(state_file)
+    ledger["waiting"]["older-large-job"] = {"pid": os.getpid(), "since": 0.0}
+    _save_ledger(ledger, state_file)
+
+    # Plenty of memory for a tiny job, but an older job is still waiting
+    with pytest.raises(MemoryError):
+        reserve_transcription_memory("tiny", 60, state_dir=str(tmp_path), max_wait_seconds=0)
+
+    ledger = _load_ledger(state_file)
+    del ledger["waiting"]["older-large-job"]
+    _save_ledger(ledger, state_file)
+    with reserve_transcription_memory("tiny", 60, state_dir=str(tmp_path), max_wait_seconds=0) as reservation:
+        assert reservation.model_size == "tiny"
@@ -0,0 +1,76 @@
+import os
+import stat
+import pytest
+from utils.artifact_store import (LocalArtifactStore, S3ArtifactStore, atomic_write,
+                                  write_json_artifact, read_json_artifact,
+                                  json_artifact_version)
+
+def test_atomic_write_replaces_file_with_default_permissions(tmp_path):
+    target = tmp_path / "out" / "lecture.vtt"
+    with atomic_write(str(target)) as f:
+        f.write("WEBVTT\n\n")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert target.read_text(encoding="utf-8") == "WEBVTT\n\n"
+    assert stat.S_IMODE(target.stat().st_mode) == 0o666 & ~umask
+    assert os.listdir(target.parent) == ["lecture.vtt"]
+
+def test_atomic_write_keeps_previous_file_on_error(tmp_path):
+    target = tmp_path / "summary.json"
+    target.write_text("old", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(target)) as f:
+            f.write("partial")
+            raise RuntimeError("crash mid-write")
+    assert target.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["summary.json"]
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_local_round_trip(tmp_path, compression):
+    store = LocalArtifactStore(str(tmp_path))
+    key = write_json_artifact({"v": 1}, "outputs/a.json", store, compression)
+    assert key == "outputs/a.json" + (".gz" if compression else "")
+    assert read_json_artifact("outputs/a.json", store, compression) == {"v": 1}
+
+def test_current_compression_wins_over_stale_plain_file(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    write_json_artifact({"v": 1}, "a.json", store)
+    write_json_artifact({"v": 2}, "a.json", store, "gzip")
+    assert read_json_artifact("a.json", store, "gzip") == {"v": 2}
+    write_json_artifact({"v": 3}, "a.json", store)
+    assert read_json_artifact("a.json", store, None) == {"v": 3}
+
+def test_local_file_outside_store_is_read_last(tmp_path):
+    outside = tmp_path / "transcript.json"
+    outside.write_text('{"v": "local"}', encoding="utf-8")
+    store = LocalArtifactStore(str(tmp_path / "store"))
+    assert read_json_artifact(str(outside), store) == {"v": "local"}
+    with pytest.raises(FileNotFoundError):
+        read_json_artifact(str(tmp_path / "missing.json"), store)
+
+@pytest.fixture
+def s3_store(monkeypatch):
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        boto3.client("s3").create_bucket(Bucket="ag-artifacts")
+        yield S3ArtifactStore("ag-artifacts", prefix="runs", multipart_mb=5)
+
+def test_s3_round_trip(s3_store, tmp_path):
+    write_json_artifact({"v": 1}, "outputs/a.json", s3_store, "gzip")
+    assert s3_store.exists("outputs/a.json.gz")
+    assert not s3_store.exists("outputs/a.json")
+    assert read_json_artifact("outputs/a.json", s3_store, "gzip") == {"v": 1}
+    key, version = json_artifact_version("outputs/a.json", s3_store, "gzip")
+    assert key == "outputs/a.json.gz"
+    write_json_artifact({"v": 2}, "outputs/a.json", s3_store, "gzip")
+    assert json_artifact_version("outputs/a.json", s3_store, "gzip") != (key, version)
+
+    vtt = tmp_path / "lecture.vtt"
+    vtt.write_bytes(b"WEBVTT\n\n" + b"x" * (6 * 1024 * 1024))  # above the multipart threshold
+    s3_store.put_file(str(vtt), "outputs/lecture.vtt")
+    assert s3_store.get_bytes("outputs/lecture.vtt") == vtt.read_bytes()
+    assert s3_store.client.head_object(Bucket="ag-artifacts", Key="runs/outputs/lecture.vtt")
@@ -0,0 +1,77 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from utils import batched_transcription
+from utils.batched_transcription import transcribe_videos_batched, benchmark_batch_sizes
+
+class StubPipeline:
+    """Stands in for BatchedInferencePipeline: fixed segments per video, no model"""
+
+    def __init__(self, videos, fail_on=None):
+        self.videos = videos  # path → (language, duration, [(start, end, text), ...])
+        self.fail_on = fail_on
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def transcribe(self, path, batch_size):
+        with self._lock:
+            self.calls.append((path, batch_size))
+        if path == self.fail_on:
+            raise RuntimeError("CUDA out of memory")
+        language, duration, segments = self.videos[path]
+        return (iter(SimpleNamespace(start=s, end=e, text=t) for s, e, t in segments),
+                SimpleNamespace(language=language, duration=duration))
+
+@pytest.fixture
+def videos(tmp_path):
+    paths = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+    for path in paths:
+        path.write_bytes(b"")
+    return {
+        str(paths[0]): ("en", 12.345, [(0.0, 4.0, " Vectors."), (4.0, 9.5, " Forces.")]),
+        str(paths[1]): ("hi", 30.0, [(1.0, 2.0, " Namaste.")]),
+    }
+
+def test_report_has_per_video_stats_and_totals(tmp_path, videos):
+    pipeline = StubPipeline(videos)
+    paths = list(videos)
+    vtts = [str(tmp_path / "a.vtt"), str(tmp_path / "b.vtt")]
+
+    report = transcribe_videos_batched(paths, vtts, batch_size=8, concurrent_videos=2,
+                                       pipeline=pipeline, publish=False)
+
+    assert sorted(pipeline.calls) == [(paths[0], 8), (paths[1], 8)]
+    assert (report["batch_size"], report["concurrent_videos"]) == (8, 2)
+    assert report["audio_seconds"] == 42.35
+    # Videos are reported in input order, whichever finished first
+    assert [(v["video"], v["vtt"], v["language"], v["audio_seconds"], v["segments"]) for v in report["videos"]] == [
+        (paths[0], vtts[0], "en", 12.35, 2),
+        (paths[1], vtts[1], "hi", 30.0, 1),
+    ]
+    assert all(v["x_realtime"] > 0 for v in report["videos"]) and report["x_realtime"] > 0
+
+    vtt = (tmp_path / "a.vtt").read_text(encoding="utf-8")
+    assert vtt.startswith("WEBVTT\n\n")
+    assert "Vectors." in vtt and "Forces." in vtt
+    assert vtt.index("Vectors.") < vtt.index("Forces.")
+
+def test_failed_video_returns_none(tmp_path, videos):
+    paths = list(videos)
+    pipeline = StubPipeline(videos, fail_on=paths[1])
+    report = transcribe_videos_batched(paths, [str(tmp_path / "a.vtt"), str(tmp_path / "b.vtt")],
+                                       pipeline=pipeline, publish=False)
+    assert report is None
+
+def test_missing_video_is_rejected_before_decoding(tmp_path, videos):
+    pipeline = StubPipeline(videos)
+    with pytest.raises(FileNotFoundError):
+        transcribe_videos_batched([str(tmp_path / "missing.mp4")], [str(tmp_path / "m.vtt")], pipeline=pipeline)
+    assert pipeline.calls == []
+
+def test_benchmark_reuses_one_pipeline_across_batch_sizes(monkeypatch, videos):
+    pipeline = StubPipeline(videos)
+    monkeypatch.setattr(batched_transcription, "load_batched_pipeline", lambda *args: pipeline)
+    results = benchmark_batch_sizes(list(videos), batch_sizes=(1, 4))
+    assert [r["batch_size"] for r in results] == [1, 4]
+    assert all(r["audio_seconds"] == 42.35 for r in results)
+    assert sorted(batch for _, batch in pipeline.calls) == [1, 1, 4, 4]
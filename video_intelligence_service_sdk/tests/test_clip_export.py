@@ -0,0 +1,77 @@
+import os
+import ffmpeg
+from utils import clip_export
+from utils.clip_export import get_keyframe_times_ms, plan_clips
+from utils.time_index import SegmentTimeIndex
+
+KEYFRAMES_MS = [0, 4_000, 8_000, 12_000, 16_000, 20_000]
+
+def chapter(title, start, end):
+    return {"chapter_title": title, "start_time": start, "end_time": end}
+
+def test_keyframe_times_are_relative_to_container_start(monkeypatch):
+    probe = {
+        "format": {"start_time": "1.400000"},
+        "packets": [
+            {"pts_time": "5.400000", "flags": "K__"},
+            {"pts_time": "1.400000", "flags": "K__"},
+            {"pts_time": "1.433333", "flags": "___"},
+            {"pts_time": "N/A", "flags": "K__"},
+        ],
+    }
+    monkeypatch.setattr(ffmpeg, "probe", lambda *args, **kwargs: probe)
+    assert get_keyframe_times_ms("lecture.ts") == [0, 4_000]
+
+def test_copy_mode_snaps_to_nearest_keyframes(tmp_path):
+    clips = plan_clips([chapter("Vectors & Forces", "00:00:03.500", "00:00:13.000")],
+                       KEYFRAMES_MS, str(tmp_path))
+    assert len(clips) == 1
+    clip = clips[0]
+    assert (clip["start_time"], clip["end_time"]) == ("00:00:04.000", "00:00:12.000")
+    assert clip["requested_start_time"] == "00:00:03.500"
+    assert clip["mode"] == "copy"
+    assert clip["file"] == os.path.join(str(tmp_path), "01_vectors_forces.mp4")
+
+def test_frame_accurate_mode_keeps_requested_times(tmp_path):
+    clip, = plan_clips([chapter("A", "00:00:03.500", "00:00:13.000")], KEYFRAMES_MS, str(tmp_path),
+                       frame_accurate=True)
+    assert (clip["start_time"], clip["end_time"], clip["mode"]) == ("00:00:03.500", "00:00:13.000", "reencode")
+
+def test_chapter_shorter_than_a_gop_keeps_requested_end(tmp_path):
+    # Both ends snap to the 4 s keyframe, so the requested end is used
+    clip, = plan_clips([chapter("Short", "00:00:04.500", "00:00:05.500")], KEYFRAMES_MS, str(tmp_path))
+    assert (clip["start_time"], clip["end_time"]) == ("00:00:04.000", "00:00:05.500")
+
+def test_invalid_and_empty_chapters_are_skipped(tmp_path):
+    chapters = [
+        "Introduction",
+        {"chapter_title": "No times"},
+        chapter("Bad time", "soon", "later"),
+        chapter("Before keyframe", "00:00:05.000", "00:00:03.000"),
+        chapter("Kept", "00:00:08.000", "00:00:16.000"),
+    ]
+    clips = plan_clips(chapters, KEYFRAMES_MS, str(tmp_path))
+    assert [(c["chapter_index"], c["chapter_title"]) for c in clips] == [(5, "Kept")]
+
+def test_time_index_adds_transcript_text(tmp_path):
+    index = SegmentTimeIndex([
+        {"id": 0, "transcript": "intro", "start_time": "00:00:00.000", "end_time": "00:00:07.000"},
+        {"id": 1, "transcript": "vectors", "start_time": "00:00:08.000", "end_time": "00:00:15.000"},
+    ])
+    clip, = plan_clips([chapter("B", "00:00:08.200", "00:00:15.500")], KEYFRAMES_MS, str(tmp_path),
+                       time_index=index)
+    assert clip["segment_id_range"] == [1, 1]
+    assert clip["transcript"] == "vectors"
+
+def test_missing_transcript_does_not_stop_export(tmp_path, monkeypatch, capsys):
+    video = tmp_path / "lecture.mp4"
+    video.write_bytes(b"")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(clip_export, "get_keyframe_times_ms", lambda path: KEYFRAMES_MS)
+    monkeypatch.setattr(clip_export, "_cut_clip", lambda path, clip: dict(clip, size_bytes=0))
+    summary = {"chapters": [chapter("A", "00:00:00.000", "00:00:08.000")]}
+    manifest = clip_export.export_chapter_clips(str(video), summary, str(tmp_path / "clips"),
+                                                transcript_file="missing.json")
+    assert manifest is not None
+    assert "transcript" not in manifest["clips"][0]
+    assert "not found" in capsys.readouterr().out
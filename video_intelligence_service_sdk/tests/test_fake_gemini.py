@@ -0,0 +1,41 @@
+import pytest
+import config
+from utils.fake_gemini import FakeGenerativeModel, classify_summary_errors, run_summary_load_test
+
+TRANSCRIPTS = [
+    {"audio_segments": [{"id": 0, "transcript": f"lecture {n}", "start_time": "00:00:00.000",
+                         "end_time": "00:00:05.000"}]}
+    for n in range(3)
+]
+
+@pytest.fixture(autouse=True)
+def single_request_summaries(monkeypatch):
+    monkeypatch.setattr(config, "SUMMARY_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "SUMMARY_FANOUT_ENABLED", False)
+    monkeypatch.setattr(config, "GEMINI_CONTEXT_CACHE_ENABLED", False)
+
+def fake_model():
+    return FakeGenerativeModel(rate_429=0.2, rate_500=0.1, malformed_rate=0.2, seed=7, time_scale=0)
+
+def test_failure_kinds_are_reported_separately():
+    assert classify_summary_errors({"summary_data": {"chapters": []}}) == []
+    assert classify_summary_errors({"error": "Generation failed: 429 Resource has been exhausted"}) == ["429"]
+    assert classify_summary_errors({"error": "Generation failed: 500 An internal error has occurred."}) == ["500"]
+    assert classify_summary_errors({"summary_data": {"error": "Could not parse JSON"}}) == ["malformed"]
+    fanout = {"summary_data": {"error": "Some sections failed: chapters: 429 Resource has been exhausted; "
+                                        "keywords: Could not parse section 'keywords' from: ..."}}
+    assert classify_summary_errors(fanout) == ["429", "malformed"]
+    assert classify_summary_errors({"error": "Generation failed: timeout"}) == ["other"]
+
+def test_load_test_outcomes_do_not_depend_on_concurrency():
+    reports = [run_summary_load_test(fake_model(), TRANSCRIPTS, 30, concurrency) for concurrency in (1, 8)]
+    serial, parallel = reports
+    stats = [dict(report["model_stats"]) for report in reports]
+    for s in stats:
+        s["simulated_seconds"] = round(s.pop("simulated_seconds"), 6)
+    assert stats[0] == stats[1]
+    assert serial["failures"] == parallel["failures"]
+    assert serial["failed"] == parallel["failed"] == len(serial["failed_jobs"])
+    assert serial["failures"]["429"] == serial["model_stats"]["429"] > 0
+    assert serial["failures"]["500"] == serial["model_stats"]["500"] > 0
+    assert serial["failures"]["malformed"] == serial["model_stats"]["malformed"] > 0
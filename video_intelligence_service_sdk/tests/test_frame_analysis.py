@@ -0,0 +1,45 @@
+import numpy as np
+from utils.frame_analysis import frame_change_scores, stitch_range_scores, detect_scene_changes, split_time_ranges
+
+FPS = 2.0
+
+def _slides(changes_at, count, size=(9, 16)):
+    """Synthetic greyscale frames that switch to a new flat 'slide' at the given frame indices"""
+    frames = np.zeros((count, *size), dtype=np.uint8)
+    level = 0
+    for i in range(count):
+        if i in changes_at:
+            level = (level + 100) % 256
+        frames[i] = level
+    return frames
+
+def _analyzed(frames, start_index):
+    """What _analyze_range returns for frames decoded from one time range"""
+    timestamps = (start_index + np.arange(len(frames))) / FPS
+    if len(frames) == 0:
+        return timestamps, np.zeros(0, dtype=np.float32), None, None
+    return timestamps, frame_change_scores(frames), frames[0], frames[-1]
+
+def test_stitched_scores_line_up_with_timestamps():
+    frames = _slides({10, 20}, 30)
+    # Split exactly on a slide change so the cut is only visible across the range boundary
+    results = [_analyzed(frames[:10], 0), _analyzed(frames[10:10], 10),
+               _analyzed(frames[10:25], 10), _analyzed(frames[25:], 25)]
+    timestamps, scores = stitch_range_scores(results)
+
+    assert len(scores) == len(timestamps) - 1
+    np.testing.assert_array_equal(timestamps, np.arange(30) / FPS)
+    np.testing.assert_array_equal(scores, frame_change_scores(frames))
+    assert detect_scene_changes(timestamps, scores, 0.1, 3.0) == [10, 20]
+
+def test_scene_changes_respect_minimum_scene_length():
+    frames = _slides({4, 6, 20}, 30)  # 4 → 6 is one second apart
+    timestamps = np.arange(30) / FPS
+    assert detect_scene_changes(timestamps, frame_change_scores(frames), 0.1, 3.0) == [6, 20]
+    assert detect_scene_changes(timestamps, frame_change_scores(frames), 0.1, 0.5) == [4, 6, 20]
+
+def test_split_time_ranges_covers_duration():
+    ranges = split_time_ranges(600.0, workers=4)
+    assert len(ranges) == 4 and ranges[0][0] == 0.0
+    assert sum(length for _, length in ranges) == 600.0
+    assert split_time_ranges(30.0, workers=8) == [(0.0, 30.0)]
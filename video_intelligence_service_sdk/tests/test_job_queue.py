@@ -0,0 +1,70 @@
+import time
+import pytest
+from utils.job_queue import open_job_queue
+from utils.worker import run_transcribe_stage
+
+@pytest.fixture
+def queue(tmp_path):
+    return open_job_queue(f"sqlite:///{tmp_path / 'jobs.db'}", retry_backoff_seconds=10.0)
+
+def _job(queue, job_id):
+    return queue._row_to_job(queue._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+def test_claim_takes_oldest_job_of_requested_stage_once(queue):
+    first = queue.enqueue("transcribe", {"video_path": "a.mp4"})
+    queue.enqueue("transcribe", {"video_path": "b.mp4"})
+    queue.enqueue("summarize", {"json_file": "c.json"})
+
+    job = queue.claim("worker-a", ["transcribe"], lease_seconds=60)
+    assert job["id"] == first and job["status"] == "running" and job["attempts"] == 1
+    assert job["payload"] == {"video_path": "a.mp4"}
+    assert queue.claim("worker-b", ["transcribe"], 60)["payload"] == {"video_path": "b.mp4"}
+    assert queue.claim("worker-c", ["transcribe"], 60) is None
+
+def test_expired_lease_is_stolen_and_old_owner_loses_it(queue):
+    job_id = queue.enqueue("transcribe", {"video_path": "a.mp4"})
+    queue.claim("worker-a", ["transcribe"], lease_seconds=-1)  # worker-a stops heartbeating
+
+    stolen = queue.claim("worker-b", ["transcribe"], lease_seconds=60)
+    assert stolen["id"] == job_id and stolen["worker_id"] == "worker-b" and stolen["attempts"] == 2
+    assert not queue.heartbeat(job_id, "worker-a", 60)
+    assert not queue.complete(job_id, "worker-a", {"vtt_file": "stale.vtt"})
+    assert queue.heartbeat(job_id, "worker-b", 60)
+
+def test_failures_back_off_then_fail_permanently(queue):
+    job_id = queue.enqueue("transcribe", {"video_path": "a.mp4"}, max_attempts=3)
+    for attempt, backoff in [(1, 10.0), (2, 20.0)]:
+        assert queue.claim("worker-a", ["transcribe"], 60)["attempts"] == attempt
+        started = time.time()
+        assert queue.fail(job_id, "worker-a", f"error {attempt}")
+        job = _job(queue, job_id)
+        assert job["status"] == "pending" and job["error"] == f"error {attempt}"
+        assert job["available_at"] == pytest.approx(started + backoff, abs=1.0)
+        assert queue.claim("worker-a", ["transcribe"], 60) is None  # still backing off
+        queue._execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+
+    queue.claim("worker-a", ["transcribe"], 60)
+    queue.fail(job_id, "worker-a", "error 3")
+    assert _job(queue, job_id)["status"] == "failed"
+    assert queue.claim("worker-a", ["transcribe"], 60) is None
+
+def test_complete_enqueues_summarize_job(queue, tmp_path, monkeypatch):
+    import config
+    monkeypatch.setattr(config, "OUTPUT_FOLDER", str(tmp_path))
+
+    def fake_transcribe(video_file, vtt_file):
+        with open(vtt_file, "w", encoding="utf-8") as f:
+            f.write("WEBVTT\n\n1\n00:00:00.000 --> 00:00:01.000\nhello class\n")
+        return vtt_file
+    monkeypatch.setattr("utils.worker.transcribe_with_admission", fake_transcribe)
+
+    job_id = queue.enqueue("transcribe", {"video_path": "/videos/lecture.mp4"}, max_attempts=2)
+    job = queue.claim("worker-a", ["transcribe"], 60)
+    result, next_jobs = run_transcribe_stage(job["payload"])
+    assert queue.complete(job_id, "worker-a", result, next_jobs)
+
+    assert _job(queue, job_id)["status"] == "done"
+    summarize = queue.claim("worker-b", ["summarize"], 60)
+    assert summarize["payload"] == {"json_file": str(tmp_path / "lecture.json"), "base_name": "lecture"}
+    assert summarize["max_attempts"] == 2
+    assert queue.stats() == {"transcribe:done": 1, "summarize:running": 1}
@@ -0,0 +1,46 @@
+from utils.live_transcription import stable_prefix_length, live_output_name
+
+def test_segments_agreed_by_two_passes_are_final():
+    previous = [(0.0, 2.0, "hello class"), (2.0, 4.0, "today we")]
+    hypothesis = [(0.0, 2.0, "hello class"), (2.0, 4.5, "today we will"), (4.5, 5.0, "study")]
+    assert stable_prefix_length(hypothesis, previous, buffer_end=5.0, latency_seconds=5.0) == 1
+
+def test_finalization_stops_at_first_unstable_segment():
+    previous = [(0.0, 2.0, "hello"), (2.0, 4.0, "changed"), (4.0, 6.0, "same")]
+    hypothesis = [(0.0, 2.0, "hello"), (2.0, 4.0, "revised"), (4.0, 6.0, "same")]
+    assert stable_prefix_length(hypothesis, previous, buffer_end=6.0, latency_seconds=5.0) == 1
+
+def test_latency_bound_finalizes_overdue_segments_without_agreement():
+    hypothesis = [(0.0, 3.0, "first"), (3.0, 6.0, "second"), (6.0, 9.0, "third")]
+    # Newest audio at 11 s with a 5 s bound: anything ending by 6 s is overdue
+    assert stable_prefix_length(hypothesis, [], buffer_end=11.0, latency_seconds=5.0) == 2
+
+def test_nothing_final_on_first_pass_within_latency():
+    hypothesis = [(0.0, 1.0, "hi"), (1.0, 2.0, "there")]
+    assert stable_prefix_length(hypothesis, [], buffer_end=2.5, latency_seconds=5.0) == 0
+
+def test_final_pass_flushes_everything():
+    hypothesis = [(0.0, 1.0, "hi"), (1.0, 2.0, "there")]
+    assert stable_prefix_length(hypothesis, [], buffer_end=2.0, latency_seconds=5.0, final=True) == 2
+
+def test_live_output_name(tmp_path):
+    recording = tmp_path / "class.ts"
+    recording.write_bytes(b"")
+    assert live_output_name(str(recording)) == "class"
+    assert live_output_name("udp://0.0.0.0:1234") == "0_0_0_0_1234"
+    assert live_output_name("rtmp://host/live/stream?key=x") == "host_live_stream_key_x"
+
+def test_final_transcript_uses_configured_compression(tmp_path, monkeypatch):
+    import config
+    from utils.artifact_store import write_json_artifact
+    from utils.json_processing import load_json
+    from utils.live_transcription import _write_transcript_json
+
+    monkeypatch.setattr(config, "ARTIFACT_COMPRESSION", "gzip")
+    output_json = str(tmp_path / "live.json")
+    write_json_artifact({"audio_segments": [{"transcript": "old session"}]}, output_json, compression="gzip")
+
+    cues = [(1, 0.0, 1.5, "new session")]
+    _write_transcript_json(cues, output_json)
+    _write_transcript_json(cues, output_json, final=True)
+    assert [s["transcript"] for s in load_json(output_json)["audio_segments"]] == ["new session"]
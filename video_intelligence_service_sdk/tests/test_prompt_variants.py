@@ -0,0 +1,62 @@
+import json
+from types import SimpleNamespace
+import pytest
+import config
+from utils import prompt_variants
+from utils.fake_gemini import FakeGenerativeModel
+
+TRANSCRIPT = {"audio_segments": [{"id": 0, "transcript": "vectors", "start_time": "00:00:00.000",
+                                  "end_time": "00:00:05.000"}]}
+
+class LoggingModel(FakeGenerativeModel):
+    """Fake model that keeps the prompts it was sent"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return super().generate_content(prompt, **kwargs)
+
+class ArrayModel(LoggingModel):
+    """Answers with a JSON array instead of a summary object"""
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text="[1, 2, 3]", usage_metadata=None)
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "SUMMARY_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "SUMMARY_FANOUT_ENABLED", False)
+    monkeypatch.setattr(config, "ARTIFACT_COMPRESSION", None)
+    created = {}
+
+    def initialize(api_key, model_name):
+        created[model_name] = (ArrayModel if model_name == "array" else LoggingModel)(model_name, time_scale=0)
+        return created[model_name]
+
+    monkeypatch.setattr(prompt_variants, "initialize_gemini", initialize)
+    return created
+
+def test_variants_send_transcript_first_and_survive_non_object_output(tmp_path, models):
+    variants = {
+        "v1": {"prompt_version": "version-01", "model": "fake"},
+        "v3": {"prompt_version": "version-03", "model": "fake"},
+        "broken": {"prompt_version": "version-03", "model": "array"},
+    }
+    results = prompt_variants.run_prompt_variants(TRANSCRIPT, variants, None, "variants")
+
+    assert set(results) == set(variants)
+    assert all(metrics["error"] is None for metrics in results.values())
+    saved = json.loads((tmp_path / "variants" / "variants_metrics.json").read_text(encoding="utf-8"))
+    assert saved["broken"]["output_file"].endswith("broken.json")
+
+    prefix = f"Transcript:\n{json.dumps(TRANSCRIPT)}\n"
+    prompts = models["array"].prompts + models["fake"].prompts
+    assert len(prompts) == 3
+    assert all(p.startswith(prefix) and p.rstrip().endswith("The transcript is given above.") for p in prompts)
+    # Only the instructions after the shared transcript differ between variants
+    assert len({p[len(prefix):] for p in models["fake"].prompts}) == 2
@@ -0,0 +1,53 @@
+import threading
+from utils.fake_gemini import FakeGenerativeModel, SECTION_KEY_PATTERN
+from utils.summarization import generate_sections_concurrently, SUMMARY_SECTIONS
+
+TRANSCRIPT = {"audio_segments": [
+    {"id": 0, "transcript": "Today we resolve forces.", "start_time": "00:00:00.000", "end_time": "00:00:05.000"}
+]}
+SCENES = [{"start_time": "00:00:00.000", "end_time": "00:00:05.000"}]
+FIXTURE = {key: f"{key} text" for key in SUMMARY_SECTIONS}
+FIXTURE.update(chapters=[{"chapter_title": "Forces"}], keyframes=[{"timestamp": "00:00:00.000"}])
+
+class OrderedFakeModel(FakeGenerativeModel):
+    """Fake model that logs when each section starts and ends, optionally failing some sections"""
+
+    def __init__(self, fail=()):
+        super().__init__(fixtures=[FIXTURE], latency_distribution="fixed", latency_mean_seconds=0.05)
+        self.fail = set(fail)
+        self.events = []
+        self.prompts = {}
+        self._events_lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        key = SECTION_KEY_PATTERN.search(prompt).group(1)
+        with self._events_lock:
+            self.events.append(("start", key))
+            self.prompts[key] = prompt
+        try:
+            if key in self.fail:
+                raise RuntimeError(f"{key} failed")
+            return super().generate_content(prompt, **kwargs)
+        finally:
+            with self._events_lock:
+                self.events.append(("end", key))
+
+def test_dependants_start_after_their_dependencies():
+    model = OrderedFakeModel()
+    summary_data = generate_sections_concurrently(TRANSCRIPT, model, SCENES, max_concurrency=8)
+
+    assert list(summary_data) == list(SUMMARY_SECTIONS) + ["keyframes"]
+    assert "error" not in summary_data
+    assert model.events.index(("start", "keyframes")) > model.events.index(("end", "chapters"))
+    # The finished chapters are handed to the keyframes request
+    assert 'Already generated "chapters"' in model.prompts["keyframes"]
+
+def test_failed_dependency_fails_its_dependants():
+    model = OrderedFakeModel(fail={"chapters"})
+    summary_data = generate_sections_concurrently(TRANSCRIPT, model, SCENES, max_concurrency=8)
+
+    assert "chapters" not in summary_data and "keyframes" not in summary_data
+    assert ("start", "keyframes") not in model.events
+    assert "chapters: chapters failed" in summary_data["error"]
+    assert "keyframes: dependency failed: chapters" in summary_data["error"]
+    assert summary_data["tags"] == "tags text"
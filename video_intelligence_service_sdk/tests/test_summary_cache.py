@@ -0,0 +1,62 @@
+import os
+import time
+import pytest
+from utils.summary_cache import SummaryCache, summary_cache_key
+
+def test_cache_key_covers_every_input():
+    key = summary_cache_key("transcript", "version-03", "gemini-2.0-flash", "abc123")
+    assert key == summary_cache_key("transcript", "version-03", "gemini-2.0-flash", "abc123")
+    assert len({
+        key,
+        summary_cache_key("transcript!", "version-03", "gemini-2.0-flash", "abc123"),
+        summary_cache_key("transcript", "version-02", "gemini-2.0-flash", "abc123"),
+        summary_cache_key("transcript", "version-03", "gemini-2.5-flash", "abc123"),
+        summary_cache_key("transcript", "version-03", "gemini-2.0-flash", "def456"),
+    }) == 5
+    # Parts are separated, so moving characters between them changes the key
+    assert summary_cache_key("b", "a", "m") != summary_cache_key("", "ab", "m")
+
+def _age(cache, key, seconds_ago):
+    stamp = time.time() - seconds_ago
+    os.utime(cache._path(key), (stamp, stamp))
+
+def test_evicts_least_recently_used_over_entry_limit(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_entries=2)
+    cache.put("a", {"v": "a"})
+    _age(cache, "a", 30)
+    cache.put("b", {"v": "b"})
+    _age(cache, "b", 20)
+    assert cache.get("a") == {"v": "a"}  # a becomes the most recently used
+    cache.put("c", {"v": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"} and cache.get("c") == {"v": "c"}
+
+def test_evicts_oldest_over_size_limit(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_entries=100, max_mb=1)
+    payload = {"text": "x" * 400_000}
+    for n, key in enumerate(["old", "mid", "new"]):
+        cache.put(key, payload)
+        _age(cache, key, 30 - n * 10)
+    cache._evict()
+    assert sorted(os.listdir(tmp_path)) == ["mid.json", "new.json"]
+
+def test_short_instruction_prefix_skips_context_cache_calls(monkeypatch):
+    import utils.summarization as summarization
+    monkeypatch.setattr(summarization, "_context_cached_models", {})
+    monkeypatch.setattr(summarization.caching.CachedContent, "list",
+                        lambda *a, **kw: pytest.fail("listing caches for a prefix that cannot be cached"))
+    model = summarization.genai.GenerativeModel("gemini-2.0-flash")
+    assert summarization.get_instruction_cached_model(model, version="version-03") is None
+
+def test_recording_wrapper_keeps_context_caching(tmp_path):
+    import utils.summarization as summarization
+    from utils.fake_gemini import RecordingModel, FakeGenerativeModel, _prompt_hash
+    real = summarization.genai.GenerativeModel("gemini-2.0-flash")
+    recording = RecordingModel(real, str(tmp_path))
+    assert summarization.context_cacheable_model(recording) is real
+    assert summarization.context_cacheable_model(FakeGenerativeModel()) is None
+
+    cached = FakeGenerativeModel(time_scale=0)
+    full_prompt = "instructions\ntranscript"
+    summarization._generate_with_cache(recording, cached, "transcript", full_prompt)
+    assert os.listdir(tmp_path) == [f"{_prompt_hash(full_prompt)}.json"]
@@ -0,0 +1,51 @@
+import pytest
+import config
+from utils.artifact_store import write_json_artifact
+from utils.time_index import SegmentTimeIndex, load_time_index
+
+SEGMENTS = [
+    {"id": 0, "transcript": "intro", "start_time": "00:00:00.000", "end_time": "00:00:09.000"},
+    {"id": 1, "transcript": "vectors", "start_time": "00:00:10.000", "end_time": "00:00:19.000"},
+    {"id": 2, "transcript": "forces", "start_time": "00:00:20.000", "end_time": "00:00:29.000"},
+    {"id": 3, "transcript": "summary", "start_time": "00:00:30.000", "end_time": "00:00:39.000"},
+]
+
+def test_lookups():
+    index = SegmentTimeIndex(SEGMENTS)
+    assert index.segment_at(12_000)["id"] == 1
+    assert index.segment_at(9_500) is None
+    assert [s["id"] for s in index.overlapping(15_000, 25_000)] == [1, 2]
+    assert index.text_between(0, 12_000) == "intro vectors"
+
+def test_shared_boundary_is_snapped_once():
+    index = SegmentTimeIndex(SEGMENTS)
+    chapters = [
+        {"chapter_title": "A", "start_time": "00:00:00.500", "end_time": "00:00:19.400"},
+        {"chapter_title": "B", "start_time": "00:00:19.400", "end_time": "00:00:38.000"},
+    ]
+    a, b = index.snap_chapters(chapters)
+    # Snapped independently, A would end at 19 s and B would start at 20 s
+    assert a["end_time"] == b["start_time"] == "00:00:20.000"
+    assert a["start_time"] == "00:00:00.000" and b["end_time"] == "00:00:39.000"
+    assert a["segment_id_range"] == [0, 1] and b["segment_id_range"] == [2, 3]
+
+def test_invalid_chapters_are_returned_unchanged():
+    index = SegmentTimeIndex(SEGMENTS)
+    chapters = ["Introduction", {"chapter_title": "No times"}, {"start_time": "soon", "end_time": "later"}]
+    assert index.snap_chapters(chapters) == chapters
+
+def test_load_time_index_reads_compressed_transcript_and_tracks_rewrites(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "ARTIFACT_STORE", "local")
+    monkeypatch.setattr(config, "ARTIFACT_COMPRESSION", "gzip")
+    write_json_artifact({"audio_segments": SEGMENTS[:2]}, "lecture.json", compression="gzip")
+    assert not (tmp_path / "lecture.json").exists()
+    index = load_time_index("lecture.json")
+    assert index.segment_at(12_000)["id"] == 1
+    assert load_time_index("lecture.json") is index
+
+    write_json_artifact({"audio_segments": SEGMENTS}, "lecture.json", compression="gzip")
+    assert load_time_index("lecture.json").segment_at(32_000)["id"] == 3
+
+    with pytest.raises(FileNotFoundError):
+        load_time_index("missing.json")
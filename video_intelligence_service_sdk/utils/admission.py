@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import uuid
+import tempfile
+import threading
+import psutil
+from utils.frame_analysis import get_video_duration
+from utils.transcription import estimate_model_memory, transcribe_video_to_vtt
+from utils.live_transcription import transcribe_live_to_vtt, MAX_WINDOW_SECONDS
+
+GB = 1024 ** 3
+RUNTIME_OVERHEAD_GB = 0.3  # interpreter, CTranslate2 runtime, ffmpeg decode buffers
+AUDIO_BYTES_PER_SECOND = 16000 * 4 * 2  # 16 kHz float32 audio, plus a resampling copy
+DOWNGRADE_ORDER = ["large", "medium", "small", "base", "tiny"]
+LARGE_MODELS = ("large", "large-v2", "large-v3")
+STALE_LOCK_SECONDS = 30.0
+
+def _state_paths(state_dir):
+    return os.path.join(state_dir, "ag_vis_admission.json"), os.path.join(state_dir, "ag_vis_admission.lock")
+
+class _LedgerLock:
+    """Cross-process lock on the shared ledger (portable lock file, no fcntl)"""
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+
+    def __enter__(self):
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > STALE_LOCK_SECONDS:
+                        os.remove(self.lock_path)  # holder crashed while holding the lock
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+def _load_ledger(state_file):
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"reservations": {}, "waiting": {}, "history": {}}
+
+def _save_ledger(ledger, state_file):
+    tmp_file = f"{state_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(ledger, f, indent=2)
+    os.replace(tmp_file, state_file)
+
+def _process_rss_gb(pid):
+    try:
+        return psutil.Process(pid).memory_info().rss / GB
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return 0.0
+
+def estimate_job_memory(model_size, audio_seconds, history=None):
+    """Estimate peak RAM in GB for transcribing `audio_seconds` of audio with `model_size`.
+
+    The static estimate is scaled by the learned actual/estimated ratio for the model.
+    """
+    static = estimate_model_memory(model_size) + RUNTIME_OVERHEAD_GB + audio_seconds * AUDIO_BYTES_PER_SECOND / GB
+    ratio = (history or {}).get(model_size, {}).get("ratio", 1.0)
+    return static * min(max(ratio, 0.5), 3.0)
+
+def memory_headroom_gb(ledger, safety_gb):
+    """Available RAM minus memory that admitted jobs have reserved but not yet touched.
+
+    A process's growth above its RSS when it first reserved counts as touched;
+    reservations from one process share that growth.
+    """
+    available = psutil.virtual_memory().available / GB
+    by_pid = {}
+    for r in ledger["reservations"].values():
+        reserved, baseline = by_pid.get(r["pid"], (0.0, None))
+        r_baseline = r.get("baseline_gb", 0.0)
+        by_pid[r["pid"]] = (reserved + r["gb"], r_baseline if baseline is None else min(baseline, r_baseline))
+    pending = sum(
+        max(0.0, reserved - max(0.0, _process_rss_gb(pid) - baseline))
+        for pid, (reserved, baseline) in by_pid.items()
+    )
+    return available - pending - safety_gb
+
+def _purge_dead_reservations(ledger):
+    ledger["reservations"] = {
+        job_id: r for job_id, r in ledger["reservations"].items() if psutil.pid_exists(r["pid"])
+    }
+    ledger["waiting"] = {
+        job_id: w for job_id, w in ledger.setdefault("waiting", {}).items() if psutil.pid_exists(w["pid"])
+    }
+
+def _first_in_line(ledger, job_id):
+    """True if no job has been waiting longer than `job_id` (waiters are admitted in arrival order)"""
+    waiting = ledger["waiting"]
+    oldest = min(waiting, key=lambda j: (waiting[j]["since"], j))
+    return oldest == job_id
+
+def _downgrade_candidates(model_size, allow_downgrade):
+    tier = "large" if model_size in LARGE_MODELS else model_size
+    if not allow_downgrade or tier not in DOWNGRADE_ORDER:
+        return [model_size]
+    return [model_size] + DOWNGRADE_ORDER[DOWNGRADE_ORDER.index(tier) + 1:]
+
+class MemoryReservation:
+    """A memory reservation held by one transcription job on this node.
+
+    Use as a context manager: the reservation is released on exit and the
+    job's measured peak RSS refines future estimates for its model size.
+    """
+
+    def __init__(self, job_id, model_size, reserved_gb, static_gb, state_dir, baseline_gb, sample_interval=0.5):
+        self.job_id = job_id
+        self.model_size = model_size
+        self.reserved_gb = reserved_gb
+        self.static_gb = static_gb
+        self.state_dir = state_dir
+        self.peak_rss_gb = 0.0
+        self._baseline_gb = baseline_gb
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, args=(sample_interval,), daemon=True)
+        self._sampler.start()
+
+    def _sample_rss(self, interval):
+        process = psutil.Process(os.getpid())
+        while not self._stop.is_set():
+            self.peak_rss_gb = max(self.peak_rss_gb, process.memory_info().rss / GB)
+            self._stop.wait(interval)
+
+    def release(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._sampler.join()
+        used_gb = max(self.peak_rss_gb - self._baseline_gb, 0.0) + RUNTIME_OVERHEAD_GB
+        state_file, lock_path = _state_paths(self.state_dir)
+        with _LedgerLock(lock_path):
+            ledger = _load_ledger(state_file)
+            ledger["reservations"].pop(self.job_id, None)
+            if self.peak_rss_gb > 0:
+                stats = ledger["history"].setdefault(self.model_size, {"ratio": 1.0, "jobs": 0})
+                observed = used_gb / self.static_gb
+                stats["ratio"] = round(0.7 * stats["ratio"] + 0.3 * observed, 4)  # EWMA
+                stats["jobs"] += 1
+            _save_ledger(ledger, state_file)
+        print(f"📉 Released {self.reserved_gb:.2f} GB reservation (peak RSS {self.peak_rss_gb:.2f} GB)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+def reserve_transcription_memory(model_size, audio_seconds, safety_gb=0.5, allow_downgrade=True,
+                                 max_wait_seconds=3600, poll_seconds=5.0, state_dir=None):
+    """Block until this node has room for a transcription job, then reserve it.
+
+    Jobs are admitted whenever their estimate fits the current headroom, so as
+    many run concurrently as fit safely. If the requested model does not fit, a
+    smaller model that does is used (when `allow_downgrade`); otherwise the job
+    waits in line. Waiters are admitted strictly in arrival order, so a large
+    job is not starved by a stream of small ones. Raises MemoryError after
+    `max_wait_seconds`.
+    """
+    state_dir = state_dir or tempfile.gettempdir()
+    state_file, lock_path = _state_paths(state_dir)
+    job_id = uuid.uuid4().hex
+    baseline_gb = _process_rss_gb(os.getpid())
+    deadline = time.time() + max_wait_seconds
+    announced = False
+
+    with _LedgerLock(lock_path):
+        ledger = _load_ledger(state_file)
+        ledger.setdefault("waiting", {})[job_id] = {"pid": os.getpid(), "since": time.time()}
+        _save_ledger(ledger, state_file)
+
+    try:
+        while True:
+            with _LedgerLock(lock_path):
+                ledger = _load_ledger(state_file)
+                _purge_dead_reservations(ledger)
+                ledger["waiting"].setdefault(job_id, {"pid": os.getpid(), "since": time.time()})
+                headroom = memory_headroom_gb(ledger, safety_gb)
+                candidate = None
+                if _first_in_line(ledger, job_id):
+                    for candidate in _downgrade_candidates(model_size, allow_downgrade):
+                        needed = estimate_job_memory(candidate, audio_seconds, ledger["history"])
+                        if needed <= headroom:
+                            ledger["waiting"].pop(job_id)
+                            ledger["reservations"][job_id] = {
+                                "pid": os.getpid(), "gb": round(needed, 3), "baseline_gb": round(baseline_gb, 3),
+                                "model_size": candidate, "created": time.time()
+                            }
+                            break
+                    else:
+                        candidate = None
+                _save_ledger(ledger, state_file)
+
+            if candidate:
+                if candidate != model_size:
+                    print(f"⬇️ Not enough memory for '{model_size}', downgrading to '{candidate}'")
+                print(f"🎟️ Admitted: reserved {needed:.2f} GB for '{candidate}' ({headroom:.2f} GB headroom)")
+                return MemoryReservation(job_id, candidate, needed,
+                                         estimate_job_memory(candidate, audio_seconds), state_dir, baseline_gb)
+
+            if time.time() >= deadline:
+                raise MemoryError(f"Not enough memory to admit a '{model_size}' job after {max_wait_seconds}s")
+            if not announced:
+                since = ledger["waiting"][job_id]["since"]
+                ahead = sum(1 for w in ledger["waiting"].values() if w["since"] < since)
+                print(f"⏳ Waiting for memory: {headroom:.2f} GB headroom, "
+                      f"{len(ledger['reservations'])} job(s) running, {ahead} ahead in line")
+                announced = True
+            time.sleep(poll_seconds)
+    except BaseException:
+        with _LedgerLock(lock_path):
+            ledger = _load_ledger(state_file)
+            ledger.setdefault("waiting", {}).pop(job_id, None)
+            _save_ledger(ledger, state_file)
+        raise
+
+def run_with_admission(transcribe, audio_seconds):
+    """Call `transcribe(model_size)` once this node has memory for `audio_seconds` of audio.
+
+    Settings come from config.py; the model size may be downgraded to fit.
+    """
+    import config
+    if not config.ADMISSION_CONTROL_ENABLED:
+        return transcribe(config.WHISPER_MODEL_SIZE)
+
+    with reserve_transcription_memory(config.WHISPER_MODEL_SIZE, audio_seconds, config.ADMISSION_SAFETY_GB,
+                                      config.ADMISSION_ALLOW_DOWNGRADE,
+                                      config.ADMISSION_MAX_WAIT_SECONDS) as reservation:
+        return transcribe(reservation.model_size)
+
+def transcribe_with_admission(video_file, vtt_file):
+    """Transcribe once this node has enough free memory for the job (settings from config.py)"""
+    import config
+    audio_seconds = get_video_duration(video_file) if config.ADMISSION_CONTROL_ENABLED else 0.0
+    return run_with_admission(lambda model_size: transcribe_video_to_vtt(video_file, vtt_file, model_size),
+                              audio_seconds)
+
+def transcribe_live_with_admission(source, output_vtt, output_json):
+    """Live transcription under admission control; memory is sized for one decode window"""
+    import config
+    return run_with_admission(
+        lambda model_size: transcribe_live_to_vtt(source, output_vtt, output_json, model_size,
+                                                  config.LIVE_LATENCY_SECONDS, config.LIVE_STEP_SECONDS,
+                                                  config.LIVE_IDLE_TIMEOUT_SECONDS),
+        MAX_WINDOW_SECONDS
+    )
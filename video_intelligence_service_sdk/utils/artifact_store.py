@@ -0,0 +1,232 @@
+import os
+import io
+import gzip
+import json
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the 'zstandard' package: pip install zstandard")
+    return zstandard
+
+def compress_bytes(data, compression):
+    """Compress bytes with 'gzip' or 'zstd' (None returns the data unchanged)"""
+    if not compression:
+        return data
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Unknown compression: {compression}")
+
+def decompress_bytes(data):
+    """Decompress bytes based on their magic header; plain data is returned as-is"""
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        return _zstandard().ZstdDecompressor().decompress(data)
+    return data
+
+def _read_umask():
+    # os.umask can only be read by setting it; do it once at import, before any worker threads exist
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+# Permissions a plain open() gives a new file (0o666 minus the umask); mkstemp would use 0o600
+DEFAULT_FILE_MODE = 0o666 & ~_read_umask()
+
+@contextmanager
+def atomic_write(path, mode="w", encoding="utf-8"):
+    """Open a temp file next to `path` and rename it into place only after a complete write.
+
+    A crash mid-write leaves the previous file (or nothing), never a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix="_" + os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, DEFAULT_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+class LocalArtifactStore:
+    """Artifacts as files under a local root folder, written atomically"""
+
+    def __init__(self, root="."):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def put_bytes(self, key, data):
+        with atomic_write(self._path(key), "wb") as f:
+            f.write(data)
+
+    def get_bytes(self, key):
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def version(self, key):
+        """Tag that changes whenever the object is rewritten"""
+        return _file_version(self._path(key))
+
+    def put_file(self, local_path, key):
+        target = self._path(key)
+        if os.path.abspath(local_path) == os.path.abspath(target):
+            return
+        with open(local_path, "rb") as src, atomic_write(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+class S3ArtifactStore:
+    """Artifacts in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+    One pooled client is shared per process; large objects are sent as
+    parallel multipart uploads. Objects only become visible once complete.
+    """
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, max_pool_connections=32,
+                 multipart_mb=8, upload_threads=8):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise ImportError("The S3 artifact store requires boto3: pip install boto3")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=max_pool_connections,
+                          retries={"max_attempts": 5, "mode": "adaptive"})
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_mb * 1024 * 1024,
+            multipart_chunksize=multipart_mb * 1024 * 1024,
+            max_concurrency=upload_threads,
+            use_threads=True
+        )
+
+    def _key(self, key):
+        key = os.path.normpath(os.path.splitdrive(key)[1]).replace("\\", "/").lstrip("/")
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put_bytes(self, key, data):
+        self.client.upload_fileobj(io.BytesIO(data), self.bucket, self._key(key), Config=self.transfer_config)
+
+    def get_bytes(self, key):
+        buffer = io.BytesIO()
+        self.client.download_fileobj(self.bucket, self._key(key), buffer, Config=self.transfer_config)
+        return buffer.getvalue()
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def version(self, key):
+        """Tag that changes whenever the object is rewritten"""
+        head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        return f"{head['ETag']}:{head['LastModified'].isoformat()}"
+
+    def put_file(self, local_path, key):
+        self.client.upload_file(local_path, self.bucket, self._key(key), Config=self.transfer_config)
+
+@lru_cache(maxsize=None)
+def get_artifact_store():
+    """Return the process-wide artifact store selected in config.py"""
+    import config
+    if config.ARTIFACT_STORE == "s3":
+        if not config.ARTIFACT_S3_BUCKET:
+            raise ValueError("ARTIFACT_S3_BUCKET must be set when ARTIFACT_STORE is 's3'")
+        return S3ArtifactStore(
+            config.ARTIFACT_S3_BUCKET, config.ARTIFACT_S3_PREFIX, config.ARTIFACT_S3_ENDPOINT_URL,
+            config.ARTIFACT_S3_MAX_CONNECTIONS, config.ARTIFACT_S3_MULTIPART_MB,
+            config.ARTIFACT_S3_UPLOAD_THREADS
+        )
+    if config.ARTIFACT_STORE == "local":
+        return LocalArtifactStore()
+    raise ValueError(f"Unknown ARTIFACT_STORE: {config.ARTIFACT_STORE}")
+
+def get_artifact_compression():
+    import config
+    return config.ARTIFACT_COMPRESSION
+
+def write_json_artifact(data, key, store=None, compression=None):
+    """Serialize and store JSON, returning the key it was written under"""
+    store = store or get_artifact_store()
+    if compression:
+        payload = compress_bytes(json.dumps(data, separators=(",", ":")).encode("utf-8"), compression)
+        key += COMPRESSION_SUFFIXES[compression]
+    else:
+        payload = json.dumps(data, indent=2).encode("utf-8")
+    store.put_bytes(key, payload)
+    return key
+
+def locate_json_artifact(key, store=None, compression=None):
+    """Find the variant of `key` to read, returning (store, resolved key).
+
+    The variant written with the current `compression` is tried first, so a
+    leftover file in another format never hides a newer result. A local file
+    outside the store (e.g. a transcript passed on the command line) comes last
+    and is returned with store None.
+    """
+    store = store or get_artifact_store()
+    preferred = key + COMPRESSION_SUFFIXES[compression] if compression else key
+    candidates = [preferred] + [c for c in [key] + [key + s for s in COMPRESSION_SUFFIXES.values()]
+                                if c != preferred]
+    for candidate in candidates:
+        if store.exists(candidate):
+            return store, candidate
+    if os.path.exists(key):
+        return None, key
+    raise FileNotFoundError(f"Artifact not found: {key}")
+
+def read_json_artifact(key, store=None, compression=None):
+    """Load JSON by key, accepting compressed variants (.gz/.zst) of the same key"""
+    store, resolved = locate_json_artifact(key, store, compression)
+    if store is None:
+        with open(resolved, "rb") as f:
+            return json.loads(decompress_bytes(f.read()))
+    return json.loads(decompress_bytes(store.get_bytes(resolved)))
+
+def json_artifact_version(key, store=None, compression=None):
+    """(resolved key, version tag) of the JSON artifact `key` resolves to; the tag changes on every rewrite"""
+    store, resolved = locate_json_artifact(key, store, compression)
+    return resolved, store.version(resolved) if store else _file_version(resolved)
+
+def publish_artifact(local_path, store=None):
+    """Copy a finished local file (e.g. a VTT) into the artifact store under the same key"""
+    store = store or get_artifact_store()
+    store.put_file(local_path, local_path)
+    return local_path
@@ -0,0 +1,109 @@
+import os
+import time
+import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from utils.artifact_store import atomic_write, publish_artifact
+from utils.transcription import load_whisper_model, format_vtt_cue, log_memory_status
+
+def load_batched_pipeline(model_size, concurrent_videos=1):
+    """One loaded model wrapped for batched decoding, shared by `concurrent_videos` threads"""
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        raise ImportError("Batched transcription needs faster-whisper >= 1.1: pip install -U faster-whisper")
+    model = load_whisper_model(model_size, num_workers=concurrent_videos)
+    return BatchedInferencePipeline(model=model)
+
+def _transcribe_one(pipeline, video_path, output_vtt, batch_size, publish=True):
+    """Decode one video's speech chunks in batches and write its VTT in segment order"""
+    started = time.time()
+    segments, info = pipeline.transcribe(video_path, batch_size=batch_size)
+    count = 0
+    with atomic_write(output_vtt) as vtt:
+        vtt.write("WEBVTT\n\n")
+        for count, segment in enumerate(segments, start=1):
+            vtt.write(format_vtt_cue(count, segment.start, segment.end, segment.text))
+    if publish:
+        publish_artifact(output_vtt)
+
+    elapsed = time.time() - started
+    stats = {
+        "video": video_path,
+        "vtt": output_vtt,
+        "language": info.language,
+        "audio_seconds": round(info.duration, 2),
+        "segments": count,
+        "elapsed_seconds": round(elapsed, 2),
+        "x_realtime": round(info.duration / max(elapsed, 1e-6), 2)
+    }
+    print(f"✅ {os.path.basename(video_path)}: {stats['audio_seconds']}s audio in "
+          f"{stats['elapsed_seconds']}s ({stats['x_realtime']}x real time) → {output_vtt}")
+    return stats
+
+def transcribe_videos_batched(video_paths, output_vtts, model_size="small", batch_size=16,
+                              concurrent_videos=1, pipeline=None, publish=True):
+    """Transcribe videos with batched decoding inside a single loaded model.
+
+    Speech chunks of each video are packed `batch_size` at a time into one
+    forward pass; `concurrent_videos` videos share the same model weights, so
+    memory does not grow with the number of videos. Returns a throughput report,
+    or None on failure.
+    """
+    for video_path in video_paths:
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    print(f"\n📦 Batched transcription: {len(video_paths)} video(s), batch size {batch_size}, "
+          f"{concurrent_videos} concurrent")
+    if pipeline is None:
+        log_memory_status(model_size)
+
+    try:
+        pipeline = pipeline or load_batched_pipeline(model_size, concurrent_videos)
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=concurrent_videos) as pool:
+            videos = list(pool.map(lambda job: _transcribe_one(pipeline, job[0], job[1], batch_size, publish),
+                                   zip(video_paths, output_vtts)))
+        elapsed = time.time() - started
+
+        audio_seconds = sum(v["audio_seconds"] for v in videos)
+        report = {
+            "batch_size": batch_size,
+            "concurrent_videos": concurrent_videos,
+            "audio_seconds": round(audio_seconds, 2),
+            "wall_seconds": round(elapsed, 2),
+            "x_realtime": round(audio_seconds / max(elapsed, 1e-6), 2),
+            "videos": videos
+        }
+        print(f"📊 Batch size {batch_size}: {report['x_realtime']}x real time "
+              f"({report['audio_seconds']}s audio in {report['wall_seconds']}s)")
+        return report
+
+    except Exception as e:
+        print("\n❌ Batched transcription failed due to an error:")
+        print(traceback.format_exc())
+        print("💡 Tip: Lower the batch size or use a smaller model if memory is low.")
+        return None
+
+def benchmark_batch_sizes(video_paths, model_size="small", batch_sizes=(1, 4, 8, 16), concurrent_videos=1):
+    """Transcribe the same videos at each batch size with one loaded model and compare throughput"""
+    try:
+        pipeline = load_batched_pipeline(model_size, concurrent_videos)
+    except Exception:
+        print("\n❌ Could not load the model for the benchmark:")
+        print(traceback.format_exc())
+        return []
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_vtts = [os.path.join(tmp_dir, f"{i}.vtt") for i in range(len(video_paths))]
+        for batch_size in batch_sizes:
+            report = transcribe_videos_batched(video_paths, output_vtts, model_size, batch_size,
+                                               concurrent_videos, pipeline, publish=False)
+            if report:
+                results.append({k: report[k] for k in ("batch_size", "audio_seconds", "wall_seconds", "x_realtime")})
+
+    print("\n📊 Throughput per batch size:")
+    for r in results:
+        print(f"   • batch {r['batch_size']:>3}: {r['x_realtime']}x real time ({r['wall_seconds']}s)")
+    return results
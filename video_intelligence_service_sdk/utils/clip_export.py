@@ -0,0 +1,143 @@
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import ffmpeg
+from utils.artifact_store import publish_artifact
+from utils.json_processing import save_json
+from utils.time_index import parse_timestamp, format_timestamp_ms, nearest_value, load_time_index
+
+def get_keyframe_times_ms(video_path):
+    """Keyframe timestamps (ms) of the first video stream, read from packet flags without decoding.
+
+    Packet pts are absolute, so the container start time (non-zero in e.g. MPEG-TS)
+    is subtracted to match chapter times and ffmpeg's -ss, which count from the start.
+    """
+    probe = ffmpeg.probe(video_path, select_streams="v:0",
+                         show_entries="packet=pts_time,flags:format=start_time")
+    start_time = probe.get("format", {}).get("start_time")
+    offset = float(start_time) if start_time not in (None, "N/A") else 0.0
+    return sorted(
+        int(round((float(packet["pts_time"]) - offset) * 1000))
+        for packet in probe.get("packets", [])
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+    )
+
+def snap_to_keyframe(t_ms, keyframes_ms):
+    """Nearest keyframe to t_ms (t_ms itself if the video has no keyframe list)"""
+    return nearest_value(keyframes_ms, t_ms)
+
+def _slugify(title, max_length=50):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", title or "").strip("_").lower()
+    return slug[:max_length] or "chapter"
+
+def plan_clips(chapters, keyframes_ms, output_dir, frame_accurate=False, time_index=None):
+    """Turn chapters into cut instructions; stream-copy cuts are moved to the nearest keyframes.
+
+    With a transcript `time_index`, each clip also carries the transcript text it covers.
+    """
+    clips = []
+    for n, chapter in enumerate(chapters, start=1):
+        if not isinstance(chapter, dict):
+            print(f"⚠️ Skipping chapter {n}: not an object")
+            continue
+        try:
+            requested_start = parse_timestamp(chapter["start_time"])
+            requested_end = parse_timestamp(chapter["end_time"])
+        except (KeyError, ValueError, AttributeError):
+            print(f"⚠️ Skipping chapter {n}: invalid start/end time")
+            continue
+        if frame_accurate:
+            start, end = requested_start, requested_end
+        else:
+            start = snap_to_keyframe(requested_start, keyframes_ms)
+            end = snap_to_keyframe(requested_end, keyframes_ms)
+        if end <= start:
+            end = requested_end  # chapter shorter than a GOP: keep the requested end
+        if end <= start:
+            print(f"⚠️ Skipping chapter {n}: empty time range")
+            continue
+        clip = {
+            "chapter_index": n,
+            "chapter_title": chapter.get("chapter_title"),
+            "requested_start_time": chapter["start_time"],
+            "requested_end_time": chapter["end_time"],
+            "start_time": format_timestamp_ms(start),
+            "end_time": format_timestamp_ms(end),
+            "mode": "reencode" if frame_accurate else "copy",
+            "file": os.path.join(output_dir, f"{n:02d}_{_slugify(chapter.get('chapter_title'))}.mp4")
+        }
+        if time_index is not None:
+            clip["segment_id_range"] = time_index.segment_id_range(start, end)
+            clip["transcript"] = time_index.text_between(start, end)
+        clips.append(clip)
+    return clips
+
+def _cut_clip(video_path, clip):
+    """Worker: cut one clip with ffmpeg (stream copy unless frame-accurate re-encode was requested)"""
+    start = parse_timestamp(clip["start_time"]) / 1000
+    duration = parse_timestamp(clip["end_time"]) / 1000 - start
+    source = ffmpeg.input(video_path, ss=start)
+    if clip["mode"] == "copy":
+        output_args = {"c": "copy", "avoid_negative_ts": "make_zero"}
+    else:
+        output_args = {"c:v": "libx264", "preset": "veryfast", "crf": 20, "c:a": "aac"}
+    # Only the main video and any audio: data/timecode tracks (e.g. from MPEG-TS) break the mp4 muxer
+    (
+        ffmpeg.output(source["v:0"], source["a?"], clip["file"], t=duration, movflags="+faststart", **output_args)
+        .global_args("-loglevel", "error")
+        .overwrite_output()
+        .run()
+    )
+    publish_artifact(clip["file"])
+    return dict(clip, size_bytes=os.path.getsize(clip["file"]))
+
+def export_chapter_clips(video_path, summary, output_dir, frame_accurate=False, max_workers=4,
+                         transcript_file=None):
+    """Cut one clip per summary chapter concurrently and write manifest.json next to them.
+
+    If `transcript_file` exists, its shared time index adds each clip's transcript
+    text to the manifest. Returns the manifest dict, or None on failure.
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    chapters = summary.get("summary_data", summary).get("chapters") or []
+    if not chapters:
+        print("⚠️ No chapters found in summary; nothing to export")
+        return None
+
+    print(f"\n✂️ Exporting {len(chapters)} chapter clip(s) from {video_path}")
+    print(f"⚙️ Mode: {'frame-accurate re-encode' if frame_accurate else 'stream copy at keyframes'}, "
+          f"{max_workers} concurrent")
+
+    try:
+        started = time.time()
+        os.makedirs(output_dir, exist_ok=True)
+        keyframes_ms = [] if frame_accurate else get_keyframe_times_ms(video_path)
+        time_index = None
+        if transcript_file:
+            try:
+                time_index = load_time_index(transcript_file)
+            except FileNotFoundError:
+                print(f"⚠️ Transcript {transcript_file} not found; clips will have no transcript text")
+        clips = plan_clips(chapters, keyframes_ms, output_dir, frame_accurate, time_index)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            exported = list(pool.map(lambda clip: _cut_clip(video_path, clip), clips))
+
+        manifest = {
+            "source_video": os.path.abspath(video_path),
+            "frame_accurate": frame_accurate,
+            "clips": exported
+        }
+        manifest_file = os.path.join(output_dir, "manifest.json")
+        save_json(manifest, manifest_file)
+        print(f"✅ {len(exported)} clip(s) exported in {time.time() - started:.1f}s → {output_dir}")
+        return manifest
+
+    except Exception as e:
+        print("\n❌ Clip export failed due to an error:")
+        print(traceback.format_exc())
+        return None
@@ -0,0 +1,304 @@
+import os
+import re
+import json
+import glob
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    from google.api_core.exceptions import ResourceExhausted, InternalServerError
+except ImportError:
+    class ResourceExhausted(Exception):
+        code = 429
+
+    class InternalServerError(Exception):
+        code = 500
+
+SECTION_KEY_PATTERN = re.compile(r'exactly one key, "([^"]+)"')
+
+def _prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+def load_fixture_summaries(patterns):
+    """Load `summary_data` objects from summary_*.json files matching the glob patterns"""
+    fixtures = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            summary_data = data.get("summary_data", data)
+            if isinstance(summary_data, dict) and "error" not in summary_data:
+                fixtures.append(summary_data)
+    return fixtures
+
+class FakeGenerativeModel:
+    """Drop-in for `genai.GenerativeModel` with simulated latency, throughput and failures.
+
+    Responses come from recorded prompt→response pairs in `record_dir` when the
+    prompt was seen before, otherwise from a fixture chosen deterministically by
+    prompt hash. Section prompts from fan-out mode get just their section.
+    Latency = first-token latency (fixed/uniform/lognormal) + output tokens / `tokens_per_second`.
+    Random draws are seeded from `seed`, the prompt hash and how often that prompt
+    was seen, so runs are repeatable at any concurrency.
+    """
+
+    def __init__(self, model_name="models/fake-gemini", fixtures=None, record_dir=None,
+                 latency_distribution="lognormal", latency_mean_seconds=1.0, latency_sigma=0.5,
+                 tokens_per_second=150.0, rate_429=0.0, rate_500=0.0, malformed_rate=0.0,
+                 seed=0, time_scale=1.0):
+        self.model_name = model_name
+        self.fixtures = fixtures or [{"overall_summary": {"summary_title": "Fake summary", "summary_text": ""}}]
+        self.record_dir = record_dir
+        self.latency_distribution = latency_distribution
+        self.latency_mean_seconds = latency_mean_seconds
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.malformed_rate = malformed_rate
+        self.time_scale = time_scale  # < 1 runs simulated latencies faster than real time
+        self.seed = seed
+        self._prompt_calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "429": 0, "500": 0, "malformed": 0, "replayed": 0, "simulated_seconds": 0.0}
+
+    def _first_token_latency(self, rng):
+        if self.latency_distribution == "fixed":
+            return self.latency_mean_seconds
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * self.latency_mean_seconds)
+        # lognormal with the requested mean
+        mu = math.log(self.latency_mean_seconds) - self.latency_sigma ** 2 / 2
+        return rng.lognormvariate(mu, self.latency_sigma)
+
+    def _recorded_response(self, prompt):
+        if not self.record_dir:
+            return None
+        path = os.path.join(self.record_dir, f"{_prompt_hash(prompt)}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["text"]
+
+    def _fixture_response(self, prompt):
+        fixture = self.fixtures[int(_prompt_hash(prompt), 16) % len(self.fixtures)]
+        section = SECTION_KEY_PATTERN.search(prompt)
+        if section:
+            fixture = {section.group(1): fixture.get(section.group(1))}
+        return json.dumps(fixture, ensure_ascii=False, indent=2)
+
+    def generate_content(self, prompt, **kwargs):
+        prompt = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        text = self._recorded_response(prompt)
+        replayed = text is not None
+        if text is None:
+            text = self._fixture_response(prompt)
+
+        prompt_hash = _prompt_hash(prompt)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["replayed"] += int(replayed)
+            call = self._prompt_calls.get(prompt_hash, 0)
+            self._prompt_calls[prompt_hash] = call + 1
+        # The n-th call with a given prompt always draws the same outcome, whatever the thread order
+        rng = random.Random(f"{self.seed}:{prompt_hash}:{call}")
+        roll = rng.random()
+        latency = self._first_token_latency(rng)
+        malformed = rng.random() < self.malformed_rate
+
+        if roll < self.rate_429:
+            time.sleep(latency * 0.1 * self.time_scale)
+            with self._lock:
+                self.stats["429"] += 1
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        if roll < self.rate_429 + self.rate_500:
+            time.sleep(latency * self.time_scale)
+            with self._lock:
+                self.stats["500"] += 1
+            raise InternalServerError("500 An internal error has occurred.")
+
+        prompt_tokens = len(prompt) // 4
+        output_tokens = len(text) // 4
+        latency += output_tokens / self.tokens_per_second
+        time.sleep(latency * self.time_scale)
+
+        if malformed:
+            # Truncated output wrapped in prose, like a cut-off generation
+            text = "Here is the summary:\n```json\n" + text[: max(1, len(text) // 2)]
+        with self._lock:
+            self.stats["malformed"] += int(malformed)
+            self.stats["simulated_seconds"] += latency
+
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(prompt_token_count=prompt_tokens,
+                                           candidates_token_count=output_tokens,
+                                           total_token_count=prompt_tokens + output_tokens,
+                                           cached_content_token_count=0)
+        )
+
+class RecordingModel:
+    """Wraps a real model and saves every prompt→response pair for later deterministic replay"""
+
+    def __init__(self, model, record_dir):
+        self.model = model
+        self.model_name = model.model_name
+        self.record_dir = record_dir
+        os.makedirs(record_dir, exist_ok=True)
+
+    def record(self, prompt, response):
+        """Save a response under the full prompt it answers (also used for context-cached calls)"""
+        path = os.path.join(self.record_dir, f"{_prompt_hash(prompt)}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "text": response.text}, f, ensure_ascii=False)
+
+    def generate_content(self, prompt, **kwargs):
+        response = self.model.generate_content(prompt, **kwargs)
+        self.record(prompt, response)
+        return response
+
+def _make_handler(model):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _not_found(self):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+        def do_GET(self):
+            self._not_found()  # e.g. cachedContents listing: context caching is not simulated
+
+        def do_POST(self):
+            if not self.path.split("?")[0].endswith(":generateContent"):
+                self._not_found()
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = "".join(
+                part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+            )
+            try:
+                response = model.generate_content(prompt)
+            except ResourceExhausted as e:
+                self._send_json(429, {"error": {"code": 429, "message": str(e), "status": "RESOURCE_EXHAUSTED"}})
+                return
+            except InternalServerError as e:
+                self._send_json(500, {"error": {"code": 500, "message": str(e), "status": "INTERNAL"}})
+                return
+            usage = response.usage_metadata
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": response.text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0
+                }],
+                "usageMetadata": {
+                    "promptTokenCount": usage.prompt_token_count,
+                    "candidatesTokenCount": usage.candidates_token_count,
+                    "totalTokenCount": usage.total_token_count
+                }
+            })
+
+        def log_message(self, format, *args):
+            pass  # keep load-test output readable
+
+    return FakeGeminiHandler
+
+def serve_fake_gemini(model, host="127.0.0.1", port=8765):
+    """Serve `model` at the Gemini REST path POST /v1beta/models/{model}:generateContent until interrupted"""
+    server = ThreadingHTTPServer((host, port), _make_handler(model))
+    print(f"🧪 Fake Gemini listening on http://{host}:{port} (model {model.model_name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 Fake Gemini stats: {model.stats}")
+    finally:
+        server.server_close()
+
+def create_fake_model_from_config(model_name="models/fake-gemini"):
+    """Build a FakeGenerativeModel from the FAKE_GEMINI_* settings in config.py"""
+    import config
+    return FakeGenerativeModel(
+        model_name=model_name,
+        fixtures=load_fixture_summaries(config.FAKE_GEMINI_FIXTURES),
+        record_dir=config.FAKE_GEMINI_RECORD_DIR,
+        latency_distribution=config.FAKE_GEMINI_LATENCY_DISTRIBUTION,
+        latency_mean_seconds=config.FAKE_GEMINI_LATENCY_MEAN_SECONDS,
+        tokens_per_second=config.FAKE_GEMINI_TOKENS_PER_SECOND,
+        rate_429=config.FAKE_GEMINI_RATE_429,
+        rate_500=config.FAKE_GEMINI_RATE_500,
+        malformed_rate=config.FAKE_GEMINI_MALFORMED_RATE,
+        seed=config.FAKE_GEMINI_SEED
+    )
+
+FAILURE_KINDS = {
+    "429": re.compile(r"\b429\b|Resource has been exhausted"),
+    "500": re.compile(r"\b500\b|internal error"),
+    "malformed": re.compile(r"Could not parse"),
+}
+
+def classify_summary_errors(summary):
+    """Failure kinds ("429", "500", "malformed", "other") found in a generate_summary result"""
+    errors = [summary.get("error")]
+    if isinstance(summary.get("summary_data"), dict):
+        errors.append(summary["summary_data"].get("error"))
+    text = " ".join(str(error) for error in errors if error)
+    if not text:
+        return []
+    return [kind for kind, pattern in FAILURE_KINDS.items() if pattern.search(text)] or ["other"]
+
+def run_summary_load_test(model, transcripts, total_jobs, concurrency):
+    """Run `generate_summary` `total_jobs` times over the transcripts and report throughput and errors.
+
+    Each failed job is listed with the kinds of failure it hit (429, 500, malformed
+    output), and `failures` counts the jobs per kind.
+    """
+    from utils.summarization import generate_summary
+
+    def one_job(i):
+        started = time.time()
+        summary = generate_summary(transcripts[i % len(transcripts)], model, None)
+        return time.time() - started, classify_summary_errors(summary)
+
+    print(f"🏋️ Load test: {total_jobs} summaries, concurrency {concurrency}, model {model.model_name}")
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_job, range(total_jobs)))
+    elapsed = time.time() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    failed_jobs = [{"job": i, "errors": kinds} for i, (_, kinds) in enumerate(results) if kinds]
+    report = {
+        "jobs": total_jobs,
+        "failed": len(failed_jobs),
+        "failures": {kind: sum(kind in job["errors"] for job in failed_jobs)
+                     for kind in list(FAILURE_KINDS) + ["other"]},
+        "failed_jobs": failed_jobs,
+        "wall_seconds": round(elapsed, 2),
+        "summaries_per_minute": round(total_jobs / elapsed * 60, 1) if elapsed else None,
+        "latency_p50": round(statistics.median(latencies), 2),
+        "latency_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+    }
+    if hasattr(model, "stats"):
+        report["model_stats"] = dict(model.stats)
+    print(f"📊 Load test report: {json.dumps(report, indent=2)}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Gemini generateContent endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    serve_fake_gemini(create_fake_model_from_config(), args.host, args.port)
@@ -0,0 +1,159 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+import ffmpeg
+import numpy as np
+from utils.transcription import format_timestamp
+
+PIXEL_CHANGE_LEVEL = 25  # grey-level difference that counts a pixel as changed
+
+def get_video_duration(video_path):
+    """Return the video duration in seconds using ffprobe"""
+    probe = ffmpeg.probe(video_path)
+    return float(probe["format"]["duration"])
+
+def split_time_ranges(duration, workers, min_chunk_seconds=60.0):
+    """Split [0, duration) into contiguous (start, length) ranges, one per worker"""
+    count = max(1, min(workers, int(duration // min_chunk_seconds) or 1))
+    bounds = np.linspace(0.0, duration, count + 1)
+    return [(float(bounds[i]), float(bounds[i + 1] - bounds[i])) for i in range(count)]
+
+def decode_frames(video_path, start, length, fps, width, height, keyframes_only=False):
+    """Decode a time range as small greyscale frames, returning (timestamps, frames[N, H, W])"""
+    input_args = {"ss": start, "t": length, "skip_loop_filter": "all"}
+    if keyframes_only:
+        input_args["skip_frame"] = "nokey"
+    out, _ = (
+        ffmpeg.input(video_path, **input_args)
+        .filter("fps", fps=fps)
+        .filter("scale", width, height, flags="fast_bilinear")
+        .output("pipe:", format="rawvideo", pix_fmt="gray")
+        .global_args("-loglevel", "error")
+        .run(capture_stdout=True)
+    )
+    frames = np.frombuffer(out, dtype=np.uint8)
+    frames = frames[: len(frames) // (width * height) * width * height].reshape(-1, height, width)
+    timestamps = start + np.arange(len(frames), dtype=np.float64) / fps
+    return timestamps, frames
+
+def frame_change_scores(frames):
+    """Fraction of changed pixels between each consecutive pair of frames (vectorized)"""
+    if len(frames) < 2:
+        return np.zeros(0, dtype=np.float32)
+    diff = np.abs(frames[1:].astype(np.int16) - frames[:-1].astype(np.int16))
+    return (diff > PIXEL_CHANGE_LEVEL).mean(axis=(1, 2)).astype(np.float32)
+
+def _analyze_range(args):
+    """Worker: score one time range, keeping only its edge frames for stitching"""
+    video_path, start, length, fps, width, height, keyframes_only = args
+    timestamps, frames = decode_frames(video_path, start, length, fps, width, height, keyframes_only)
+    if len(frames) == 0:
+        return timestamps, np.zeros(0, dtype=np.float32), None, None
+    return timestamps, frame_change_scores(frames), frames[0].copy(), frames[-1].copy()
+
+def stitch_range_scores(results):
+    """Join per-range `_analyze_range` results into one (timestamps, scores) timeline.
+
+    The boundary between ranges is scored from one range's last frame and the
+    next one's first, so scores[i] always compares timestamps[i] and timestamps[i+1].
+    """
+    all_timestamps, all_scores = [], []
+    previous_last = None
+    for timestamps, scores, first, last in results:
+        if first is None:
+            continue
+        if previous_last is not None:
+            all_scores.append(frame_change_scores(np.stack([previous_last, first])))
+        all_timestamps.append(timestamps)
+        all_scores.append(scores)
+        previous_last = last
+
+    if not all_timestamps:
+        raise ValueError("No frames could be decoded")
+    return np.concatenate(all_timestamps), np.concatenate(all_scores)
+
+def detect_scene_changes(timestamps, scores, threshold, min_scene_seconds):
+    """Pick cut timestamps where the change score crosses the threshold.
+
+    `scores[i]` compares frame i with frame i+1, so a cut lands on timestamps[i+1].
+    Cuts closer than `min_scene_seconds` to the previous one are dropped.
+    """
+    candidates = np.flatnonzero(scores >= threshold) + 1
+    cuts = []
+    last = timestamps[0] if len(timestamps) else 0.0
+    for i in candidates:
+        if timestamps[i] - last >= min_scene_seconds:
+            cuts.append(int(i))
+            last = timestamps[i]
+    return cuts
+
+def _extract_thumbnail(args):
+    """Worker: save one thumbnail image at a timestamp"""
+    video_path, timestamp, output_path, thumb_width = args
+    (
+        ffmpeg.input(video_path, ss=timestamp)
+        .filter("scale", thumb_width, -2)
+        .output(output_path, vframes=1, **{"q:v": 4})
+        .global_args("-loglevel", "error")
+        .overwrite_output()
+        .run()
+    )
+    return output_path
+
+def extract_keyframes(video_path, output_dir, fps=2.0, size=(160, 90), threshold=0.1,
+                      min_scene_seconds=3.0, workers=None, thumb_width=320, keyframes_only=False):
+    """Detect scene/slide changes and save timestamped keyframe thumbnails.
+
+    Returns {"duration", "keyframes", "scenes"} where each scene has start/end
+    times in VTT format plus the path of its keyframe thumbnail.
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    workers = workers or os.cpu_count() or 1
+    width, height = size
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"\n🎞️ Analyzing frames: {video_path}")
+    print(f"🔍 Sampling {fps} fps at {width}x{height} with {workers} worker(s)")
+
+    try:
+        started = time.time()
+        duration = get_video_duration(video_path)
+        ranges = split_time_ranges(duration, workers)
+        jobs = [(video_path, start, length, fps, width, height, keyframes_only) for start, length in ranges]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_analyze_range, jobs))
+
+            timestamps, scores = stitch_range_scores(results)
+            cuts = detect_scene_changes(timestamps, scores, threshold, min_scene_seconds)
+            starts = [0] + cuts
+            thumb_jobs = [
+                (video_path, float(timestamps[i]), os.path.join(output_dir, f"keyframe_{n:04d}.jpg"), thumb_width)
+                for n, i in enumerate(starts, start=1)
+            ]
+            thumbnails = list(pool.map(_extract_thumbnail, thumb_jobs))
+
+        scenes = []
+        for n, i in enumerate(starts):
+            end = float(timestamps[starts[n + 1]]) if n + 1 < len(starts) else duration
+            scenes.append({
+                "id": n + 1,
+                "start_time": format_timestamp(float(timestamps[i])),
+                "end_time": format_timestamp(end),
+                "change_score": round(float(scores[i - 1]), 3) if i > 0 else None,
+                "thumbnail": thumbnails[n]
+            })
+        keyframes = [{"timestamp": s["start_time"], "thumbnail": s["thumbnail"]} for s in scenes]
+
+        elapsed = time.time() - started
+        print(f"✅ {len(scenes)} scenes detected in {elapsed:.1f}s "
+              f"({duration / max(elapsed, 1e-6):.1f}x real time)")
+        return {"duration": format_timestamp(duration), "keyframes": keyframes, "scenes": scenes}
+
+    except Exception as e:
+        print("\n❌ Frame analysis failed due to an error:")
+        print(traceback.format_exc())
+        return None
@@ -1,5 +1,5 @@
 import re
-import json
+from utils.artifact_store import write_json_artifact, read_json_artifact, get_artifact_compression
 
 def vtt_to_json(vtt_file):
     """Convert VTT file to JSON format"""
@@ -32,12 +32,10 @@ def vtt_to_json(vtt_file):
     return {"audio_segments": audio_segments}
 
 def save_json(data, filename):
-    """Save JSON data to file"""
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-    print(f"✅ JSON saved as {filename}")
+    """Save JSON data through the artifact store (atomic, optionally compressed)"""
+    key = write_json_artifact(data, filename, compression=get_artifact_compression())
+    print(f"✅ JSON saved as {key}")
 
 def load_json(filename):
-    """Load JSON data from file"""
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
\ No newline at end of file
+    """Load JSON data from a local file or the artifact store"""
+    return read_json_artifact(filename, compression=get_artifact_compression())
\ No newline at end of file
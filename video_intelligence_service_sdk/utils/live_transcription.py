@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import queue
+import threading
+import traceback
+import ffmpeg
+import numpy as np
+from utils.artifact_store import atomic_write, publish_artifact, write_json_artifact, get_artifact_compression
+from utils.transcription import load_whisper_model, format_vtt_cue, format_timestamp, log_memory_status
+
+SAMPLE_RATE = 16000
+READ_CHUNK_SECONDS = 0.5
+MAX_WINDOW_SECONDS = 30.0  # Whisper decodes at most 30 s of audio per window
+
+def live_output_name(source):
+    """Base name for a live source's outputs: file stem, or a filesystem-safe form of a stream URL"""
+    if os.path.exists(source):
+        return os.path.splitext(os.path.basename(source))[0]
+    name = re.sub(r"^[A-Za-z][A-Za-z0-9+.-]*://", "", source)  # drop the udp:// / rtmp:// scheme
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "live"
+
+def open_live_audio(source, idle_timeout):
+    """Start ffmpeg decoding a growing file or a stream input to 16 kHz mono PCM on stdout"""
+    if os.path.exists(source):
+        # follow=1 keeps reading at EOF while the recorder is still writing;
+        # rw_timeout ends the session once the file stops growing.
+        stream = ffmpeg.input(f"file:{os.path.abspath(source)}", follow=1,
+                              rw_timeout=int(idle_timeout * 1_000_000))
+    else:
+        stream = ffmpeg.input(source)
+    return (
+        stream.output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+
+def _read_pcm(process, chunks):
+    """Push decoded PCM chunks from ffmpeg onto a queue, then None at end of input"""
+    chunk_bytes = int(SAMPLE_RATE * READ_CHUNK_SECONDS) * 2
+    while True:
+        data = process.stdout.read(chunk_bytes)
+        if not data:
+            break
+        samples = np.frombuffer(data[: len(data) // 2 * 2], dtype=np.int16)
+        chunks.put(samples.astype(np.float32) / 32768.0)
+    chunks.put(None)
+
+def _write_transcript_json(cues, output_json, final=False):
+    """Rewrite the transcript JSON atomically; already finalized entries never change.
+
+    Updates during the session go to the local file; the `final` write goes
+    through the artifact store with the configured compression, like save_json.
+    """
+    audio_segments = [
+        {
+            "id": index,
+            "transcript": text,
+            "start_time": format_timestamp(start),
+            "end_time": format_timestamp(end)
+        }
+        for index, start, end, text in cues
+    ]
+    if final:
+        write_json_artifact({"audio_segments": audio_segments}, output_json,
+                            compression=get_artifact_compression())
+        return
+    with atomic_write(output_json) as f:
+        json.dump({"audio_segments": audio_segments}, f, indent=2)
+
+def stable_prefix_length(hypothesis, previous, buffer_end, latency_seconds, final=False):
+    """Number of leading hypothesis segments that can be finalized.
+
+    A segment is final once two consecutive passes agree on its text, or once it
+    ended more than `latency_seconds` before the newest audio (the latency bound).
+    """
+    if final:
+        return len(hypothesis)
+    count = 0
+    for i, (start, end, text) in enumerate(hypothesis):
+        agreed = i < len(previous) and previous[i][2] == text
+        overdue = end <= buffer_end - latency_seconds
+        if not (agreed or overdue):
+            break
+        count = i + 1
+    return count
+
+def transcribe_live_to_vtt(source, output_vtt, output_json, model_size="small",
+                           latency_seconds=5.0, step_seconds=2.0, idle_timeout=15.0):
+    """Transcribe a growing recording or stream in sliding windows.
+
+    Finalized cues are appended to the VTT and transcript JSON as they stabilize;
+    earlier output is never rewritten. Returns the VTT path, or None on failure.
+    """
+    print(f"\n📡 Live input: {source}")
+    print(f"🎯 Output subtitle: {output_vtt}")
+    print(f"⏱️ Latency bound: ~{latency_seconds:.1f}s (decode every {step_seconds:.1f}s)")
+
+    log_memory_status(model_size)
+
+    process = None
+    cues = []
+    try:
+        model = load_whisper_model(model_size)
+        process = open_live_audio(source, idle_timeout)
+        chunks = queue.Queue()
+        threading.Thread(target=_read_pcm, args=(process, chunks), daemon=True).start()
+
+        with open(output_vtt, "w", encoding="utf-8") as vtt:
+            vtt.write("WEBVTT\n\n")
+        _write_transcript_json([], output_json)
+
+        previous = []
+        language = None
+        buffer = np.zeros(0, dtype=np.float32)
+        buffer_offset = 0.0  # absolute time of buffer[0] in seconds
+        finished = False
+
+        while not finished:
+            # Block until one decode step of new audio has arrived (or input ends)
+            new_audio = []
+            new_samples = 0
+            while new_samples < step_seconds * SAMPLE_RATE:
+                chunk = chunks.get()
+                if chunk is None:
+                    finished = True
+                    break
+                new_audio.append(chunk)
+                new_samples += len(chunk)
+            if new_audio:
+                buffer = np.concatenate([buffer] + new_audio)
+            if len(buffer) == 0:
+                continue
+
+            buffer_end = buffer_offset + len(buffer) / SAMPLE_RATE
+            prompt = " ".join(text for _, _, _, text in cues[-3:]) or None
+            segments, info = model.transcribe(
+                buffer, language=language, initial_prompt=prompt,
+                condition_on_previous_text=False, vad_filter=True
+            )
+            hypothesis = [
+                (buffer_offset + s.start, min(buffer_offset + s.end, buffer_end), s.text.strip())
+                for s in segments if s.text.strip()
+            ]
+            if language is None and hypothesis:
+                language = info.language
+                print(f"🌐 Detected language: {info.language}, Probability: {info.language_probability:.2f}")
+
+            force = finished or len(buffer) >= MAX_WINDOW_SECONDS * SAMPLE_RATE
+            count = stable_prefix_length(hypothesis, previous, buffer_end, latency_seconds, final=force)
+
+            if count:
+                with open(output_vtt, "a", encoding="utf-8") as vtt:
+                    for start, end, text in hypothesis[:count]:
+                        index = len(cues) + 1
+                        cues.append((index, start, end, text))
+                        vtt.write(format_vtt_cue(index, start, end, text))
+                _write_transcript_json(cues, output_json)
+                print(f"📝 [{format_timestamp(hypothesis[count - 1][1])}] {count} cue(s) finalized")
+                cut_at = hypothesis[count - 1][1]
+            elif not hypothesis:
+                # Silence: keep only the most recent audio in case speech is starting
+                cut_at = max(buffer_offset, buffer_end - latency_seconds)
+            else:
+                cut_at = buffer_offset
+
+            trim = int((cut_at - buffer_offset) * SAMPLE_RATE)
+            buffer = buffer[trim:]
+            buffer_offset += trim / SAMPLE_RATE
+            previous = hypothesis[count:]
+
+        publish_artifact(output_vtt)
+        _write_transcript_json(cues, output_json, final=True)
+        print(f"\n✅ Live subtitles saved as {output_vtt} ({len(cues)} cues)")
+        return output_vtt
+
+    except KeyboardInterrupt:
+        publish_artifact(output_vtt)
+        _write_transcript_json(cues, output_json, final=True)
+        print("\n⏹️ Live transcription stopped by user")
+        return output_vtt
+
+    except Exception as e:
+        print("\n❌ Live transcription failed due to an error:")
+        print(traceback.format_exc())
+        return None
+
+    finally:
+        if process is not None:
+            process.kill()
+            process.wait()
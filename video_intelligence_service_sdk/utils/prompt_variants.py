@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.json_processing import save_json
+from utils.summarization import (initialize_gemini, generate_summary, summary_uses_fanout, summary_variable_part,
+                                 generate_variant_context, context_cacheable_model, get_transcript_cached_model)
+
+def run_prompt_variants(transcript_json, variants, api_key, output_dir, scenes=None, max_concurrency=3):
+    """Summarize one transcript with several named prompt variants concurrently.
+
+    `variants` maps a name to {"prompt_version": ..., "model": ...}. The transcript
+    is loaded once, one model client is shared per model name, and the prompt puts
+    the transcript first: with GEMINI_TRANSCRIPT_CACHE_ENABLED it is cached once per
+    model and each variant sends only its own instructions. Each summary is saved
+    as `<output_dir>/<name>.json` next to a `variants_metrics.json` comparison.
+    """
+    import config
+    os.makedirs(output_dir, exist_ok=True)
+    models = {spec["model"]: initialize_gemini(api_key, spec["model"]) for spec in variants.values()}
+    context = generate_variant_context(summary_variable_part(transcript_json, scenes))
+
+    # Fan-out variants cache their own section context, so only single-request variants need this one
+    transcript_caches = {}
+    if config.GEMINI_TRANSCRIPT_CACHE_ENABLED:
+        for model_name, model in models.items():
+            cacheable = context_cacheable_model(model)
+            if cacheable and any(spec["model"] == model_name and not summary_uses_fanout(spec["prompt_version"])
+                                 for spec in variants.values()):
+                transcript_caches[model_name] = get_transcript_cached_model(
+                    cacheable, context, config.GEMINI_CONTEXT_CACHE_TTL_MINUTES)
+
+    def run_variant(name, spec):
+        metrics = {"prompt_version": spec["prompt_version"], "model": spec["model"], "cache_hit": False}
+        _, cached_model = transcript_caches.get(spec["model"], (None, None))
+        started = time.time()
+        summary = generate_summary(transcript_json, models[spec["model"]], api_key, scenes,
+                                   prompt_version=spec["prompt_version"], metrics=metrics,
+                                   transcript_context=context, transcript_cached_model=cached_model)
+        metrics["latency_seconds"] = round(time.time() - started, 2)
+        summary_data = summary.get("summary_data")
+        metrics["error"] = summary.get("error") or (
+            summary_data.get("error") if isinstance(summary_data, dict) else None)
+
+        output_file = os.path.join(output_dir, f"{name}.json")
+        save_json(summary, output_file)
+        metrics["output_file"] = output_file
+        return name, metrics
+
+    print(f"\n🧪 Running {len(variants)} prompt variant(s): {', '.join(variants)}")
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            results = dict(pool.map(lambda item: run_variant(*item), variants.items()))
+    finally:
+        for cached_content, _ in transcript_caches.values():
+            if cached_content is not None:
+                try:
+                    cached_content.delete()
+                except Exception as e:
+                    print(f"ℹ️ Could not delete cached transcript {cached_content.name}: {e}")
+
+    for name, metrics in results.items():
+        status = "❌" if metrics["error"] else "✅"
+        print(f"   {status} {name}: {metrics['latency_seconds']}s, "
+              f"{metrics.get('prompt_tokens', 0)} prompt / {metrics.get('output_tokens', 0)} output tokens"
+              f"{' (cache hit)' if metrics['cache_hit'] else ''}")
+
+    save_json(results, os.path.join(output_dir, "variants_metrics.json"))
+    return results
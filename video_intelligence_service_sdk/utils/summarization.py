@@ -1,111 +1,164 @@
 import google.generativeai as genai
+from google.generativeai import caching
 import json
 import re
-from datetime import datetime
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from utils.time_index import SegmentTimeIndex
+from utils.fake_gemini import create_fake_model_from_config, RecordingModel
+from utils.summary_cache import get_summary_cache, summary_cache_key, record_cache_event
+
+SUMMARY_PROMPT_VERSION = "version-03"  # default prompt
+SUMMARY_PROMPT_VERSIONS = ["version-01", "version-02", "version-03"]
+_context_cached_models = {}
+
+# Style block shared by the version-03 prompt and the fan-out section prompts
+VERSION_03_STYLE = """Stylistic Instructions:
+        - Write in a smooth, educational tone suitable for LMS.
+        - **Always output valid JSON only** (no text outside the JSON).
+        - When representing **mathematical or physics equations**, use LaTeX-style markup inside `$$...$$` (e.g., `"F = ma"` → `"$$F = ma$$"`).
+        - When representing **chemical formulas or equations**, use subscript/superscript HTML markup (e.g., `"H₂O"` → `"H<sub>2</sub>O"`, `"Na⁺"` → `"Na<sup>+</sup>"`).
+        - For **biological terms**, you may italicize species names or key biological terms using `<i>...</i>` where appropriate.
+        - Ensure the JSON is clean, properly escaped, and parsable."""
+_metrics_lock = threading.Lock()
+
+def initialize_gemini(api_key, model_name="gemini-2.0-flash"):
+    """Initialize Gemini model (or the local stand-in selected by GEMINI_BACKEND)"""
+    import config
+    if config.GEMINI_BACKEND == "fake":
+        return create_fake_model_from_config(f"models/fake-{model_name}")
+    if config.GEMINI_BACKEND == "fake-http":
+        genai.configure(api_key=api_key or "fake-key", transport="rest",
+                        client_options={"api_endpoint": config.FAKE_GEMINI_URL})
+    else:
+        genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name)  # gemini-2.0-flash by default for faster processing
+    # Record real responses only; a fake-http run would overwrite them with fake ones
+    if config.GEMINI_RECORD_DIR and config.GEMINI_BACKEND == "gemini":
+        return RecordingModel(model, config.GEMINI_RECORD_DIR)
+    return model
+
+def generate_scene_prompt(scenes):
+    """Prompt section describing visual scene changes detected in the video frames"""
+    scene_list = [
+        {"start_time": s["start_time"], "end_time": s["end_time"]} for s in scenes
+    ]
+    return f"""
+        Visual scene changes:
+        The following time ranges were detected from the video frames (slide or scene changes).
+        - Prefer these boundaries when choosing chapter "start_time" and "end_time".
+        - Also return "keyframes" → a list of objects with "timestamp" (a scene start_time from this list) and "description" of the key concept, diagram or derivation shown there.
+        {json.dumps(scene_list)}
+        """
 
-def initialize_gemini(api_key):
-    """Initialize Gemini model"""
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel("gemini-2.0-flash")  # Using flash for faster processing
+def generate_summary_instructions(version=None):
+    """Fixed instruction prefix of the summarization prompt for a prompt version"""
+    version = version or SUMMARY_PROMPT_VERSION
+    if version not in SUMMARY_PROMPT_VERSIONS:
+        raise ValueError(f"Unknown prompt version: {version}")
 
-def generate_summary_prompt(transcript_json):
-    """Generate the prompt for summarization"""
     # version-01
-#     prompt = """
-# You are an expert educational content analyst and summarizer.
+    if version == "version-01":
+        prompt = """
+You are an expert educational content analyst and summarizer.
 
-# Your task is to analyze a transcript JSON (list of time-stamped text segments) and generate a detailed, structured JSON summary suitable for LMS (Learning Management System) display for students of Classes 10–12 preparing for JEE and NEET.
+Your task is to analyze a transcript JSON (list of time-stamped text segments) and generate a detailed, structured JSON summary suitable for LMS (Learning Management System) display for students of Classes 10–12 preparing for JEE and NEET.
 
-# Maintain the following structure and keys exactly:
+Maintain the following structure and keys exactly:
 
-# 1. "overall_summary" → an object containing:
-#     - "summary_title": a short, meaningful title summarizing the entire lecture (e.g., "Understanding Force Resolution and Vector Addition in Physics").
-#     - "summary_text": a 3–4 paragraph overall summary describing the full lecture or video in a clear, engaging tone.
+1. "overall_summary" → an object containing:
+    - "summary_title": a short, meaningful title summarizing the entire lecture (e.g., "Understanding Force Resolution and Vector Addition in Physics").
+    - "summary_text": a 3–4 paragraph overall summary describing the full lecture or video in a clear, engaging tone.
 
-# 2. "starting_build_up" → describe how the session begins, what context or motivation is provided, and what students will learn.
+2. "starting_build_up" → describe how the session begins, what context or motivation is provided, and what students will learn.
 
-# 3. "timestamp_wise_summary" → an array of objects, each containing:
-#     - "start_time"
-#     - "end_time"
-#     - "summary_title": a short title for that section or subtopic (e.g., "Vector Addition and Resultant Forces").
-#     - "summary": a concise description of what is discussed in that segment.
+3. "timestamp_wise_summary" → an array of objects, each containing:
+    - "start_time"
+    - "end_time"
+    - "summary_title": a short title for that section or subtopic (e.g., "Vector Addition and Resultant Forces").
+    - "summary": a concise description of what is discussed in that segment.
 
-# 4. "end_summary" → a concise wrap-up highlighting final concepts, conclusions, or takeaways.
+4. "end_summary" → a concise wrap-up highlighting final concepts, conclusions, or takeaways.
 
-# 5. "chapters" → a list of key chapters with:
-#     - "chapter_title"
-#     - "start_time"
-#     - "end_time"
-#     - "description"
+5. "chapters" → a list of key chapters with:
+    - "chapter_title"
+    - "start_time"
+    - "end_time"
+    - "description"
 
-# 6. "chapter_wise_summary" → a descriptive summary for each chapter, where each item includes:
-#     - "chapter_title": the same title from the chapters list.
-#     - "summary_text": a natural paragraph summarizing what the chapter covers, in a student-friendly tone.
+6. "chapter_wise_summary" → a descriptive summary for each chapter, where each item includes:
+    - "chapter_title": the same title from the chapters list.
+    - "summary_text": a natural paragraph summarizing what the chapter covers, in a student-friendly tone.
 
-# 7. "tags" → 8–12 short keywords or topic phrases that describe the main concepts.
+7. "tags" → 8–12 short keywords or topic phrases that describe the main concepts.
 
-# 8. "keyframes" → important timestamps where a key concept, diagram, derivation, or visual explanation is introduced, with:
-#     - "timestamp"
-#     - "description"
+8. "keyframes" → important timestamps where a key concept, diagram, derivation, or visual explanation is introduced, with:
+    - "timestamp"
+    - "description"
 
-# 9. "Q&A" → 6–10 question-answer pairs that test understanding of the topic.
-#    - Include both conceptual and numerical questions.
-#    - Include 3–4 relevant **numerical or problem-based questions** suitable for JEE/NEET level.
-#    - Remaining should be conceptual or theoretical.
-#    - Ensure questions are realistic, exam-oriented, and derived directly from the lecture concepts.
-#    - Answers should be concise, clear, and accurate.
+9. "Q&A" → 6–10 question-answer pairs that test understanding of the topic.
+   - Include both conceptual and numerical questions.
+   - Include 3–4 relevant **numerical or problem-based questions** suitable for JEE/NEET level.
+   - Remaining should be conceptual or theoretical.
+   - Ensure questions are realistic, exam-oriented, and derived directly from the lecture concepts.
+   - Answers should be concise, clear, and accurate.
 
-# Stylistic instructions:
-# - Write in a smooth, student-friendly, educational tone suitable for LMS summaries.
-# - Do not mention textbooks, sections, or say "the teacher said".
-# - Use natural paragraph flow (not bullet points) for summaries.
-# - Maintain a clear connection between chapters and timestamp summaries.
-# - Output must be **only valid JSON** (no explanations or extra text outside JSON).
+Stylistic instructions:
+- Write in a smooth, student-friendly, educational tone suitable for LMS summaries.
+- Do not mention textbooks, sections, or say "the teacher said".
+- Use natural paragraph flow (not bullet points) for summaries.
+- Maintain a clear connection between chapters and timestamp summaries.
+- Output must be **only valid JSON** (no explanations or extra text outside JSON).
 
-# Transcript:
-# """
+Transcript:
+"""
+        return prompt
 
     # version-02 mroe clean prompt and no unsed things mention 
-    # prompt = f"""
-    # You are an expert educational content analyst and summarizer.
+    if version == "version-02":
+        prompt = f"""
+    You are an expert educational content analyst and summarizer.
 
-    # Your task is to analyze a transcript JSON (list of time-stamped text segments) and generate a detailed, structured JSON summary suitable for LMS (Learning Management System) display for students of Classes 10–12 preparing for JEE and NEET.
+    Your task is to analyze a transcript JSON (list of time-stamped text segments) and generate a detailed, structured JSON summary suitable for LMS (Learning Management System) display for students of Classes 10–12 preparing for JEE and NEET.
 
-    # Maintain the following structure and keys exactly:
+    Maintain the following structure and keys exactly:
 
-    # 1. "overall_summary" → an object containing:
-    #     - "summary_title": a short, meaningful title summarizing the entire lecture and we can use that as video title so keep it sort and student-friendly (e.g., "Understanding Force Resolution and Vector Addition in Physics").
-    #     - "summary_text": a 3–4 paragraph overall summary describing the full lecture or video in a clear, engaging tone.
+    1. "overall_summary" → an object containing:
+        - "summary_title": a short, meaningful title summarizing the entire lecture and we can use that as video title so keep it sort and student-friendly (e.g., "Understanding Force Resolution and Vector Addition in Physics").
+        - "summary_text": a 3–4 paragraph overall summary describing the full lecture or video in a clear, engaging tone.
 
-    # 2. "starting_build_up" → describe how the session begins, what context or motivation is provided, and what students will learn.
+    2. "starting_build_up" → describe how the session begins, what context or motivation is provided, and what students will learn.
 
-    # 3. "end_summary" → a concise wrap-up highlighting final concepts, conclusions, or takeaways.
+    3. "end_summary" → a concise wrap-up highlighting final concepts, conclusions, or takeaways.
 
-    # 4. "chapters" → a list of key chapters with:
-    #     - "chapter_title"
-    #     - "start_time"
-    #     - "end_time"
-    #     - "summary_text": a natural paragraph summarizing what the chapter covers, in a student-friendly tone.
-    #     - "description"
+    4. "chapters" → a list of key chapters with:
+        - "chapter_title"
+        - "start_time"
+        - "end_time"
+        - "summary_text": a natural paragraph summarizing what the chapter covers, in a student-friendly tone.
+        - "description"
 
-    # 5. "tags" → 8–12 short keywords or topic phrases that describe the main concepts.
+    5. "tags" → 8–12 short keywords or topic phrases that describe the main concepts.
 
-    # 6. "Q&A" → 6–10 question-answer pairs that test understanding of the topic.
-    # - Include both conceptual and numerical questions.
-    # - Include 3–4 relevant **numerical or problem-based questions** suitable for JEE/NEET level.
-    # - Remaining should be conceptual or theoretical.
-    # - Ensure questions are realistic, exam-oriented, and derived directly from the lecture concepts.
-    # - Answers should be concise, clear, and accurate.
+    6. "Q&A" → 6–10 question-answer pairs that test understanding of the topic.
+    - Include both conceptual and numerical questions.
+    - Include 3–4 relevant **numerical or problem-based questions** suitable for JEE/NEET level.
+    - Remaining should be conceptual or theoretical.
+    - Ensure questions are realistic, exam-oriented, and derived directly from the lecture concepts.
+    - Answers should be concise, clear, and accurate.
 
-    # Stylistic instructions:
-    # - Write in a smooth, student-friendly, educational tone suitable for LMS summaries.
-    # - Do not mention textbooks, sections, or say “the teacher said”.
-    # - Use natural paragraph flow (not bullet points) for summaries.
-    # - Maintain a clear connection between chapters and timestamp summaries.
-    # - Output must be **only valid JSON** (no explanations or extra text outside JSON).
+    Stylistic instructions:
+    - Write in a smooth, student-friendly, educational tone suitable for LMS summaries.
+    - Do not mention textbooks, sections, or say “the teacher said”.
+    - Use natural paragraph flow (not bullet points) for summaries.
+    - Maintain a clear connection between chapters and timestamp summaries.
+    - Output must be **only valid JSON** (no explanations or extra text outside JSON).
 
-    # Transcript:
-    # """
+    Transcript:
+    """
+        return prompt
 
     # version-03 | Add instruction for chamical formula and quations  
     prompt = f"""
@@ -137,37 +190,404 @@ def generate_summary_prompt(transcript_json):
         - Include 3–4 numerical or problem-based questions suitable for JEE/NEET.
         - Answers should be clear and accurate.
 
-        Stylistic Instructions:
-        - Write in a smooth, educational tone suitable for LMS.
-        - **Always output valid JSON only** (no text outside the JSON).
-        - When representing **mathematical or physics equations**, use LaTeX-style markup inside `$$...$$` (e.g., `"F = ma"` → `"$$F = ma$$"`).
-        - When representing **chemical formulas or equations**, use subscript/superscript HTML markup (e.g., `"H₂O"` → `"H<sub>2</sub>O"`, `"Na⁺"` → `"Na<sup>+</sup>"`).
-        - For **biological terms**, you may italicize species names or key biological terms using `<i>...</i>` where appropriate.
-        - Ensure the JSON is clean, properly escaped, and parsable.
+        {VERSION_03_STYLE}
 
         Transcript:
         """
     
-    return f"{prompt}\n{json.dumps(transcript_json)}"
+    return prompt
 
-def generate_summary(transcript_json, model, api_key):
-    """Generate summary using Gemini"""
-    prompt = generate_summary_prompt(transcript_json)
-    
+def generate_summary_prompt(transcript_json, version=None):
+    """Generate the prompt for summarization"""
+    return f"{generate_summary_instructions(version)}\n{json.dumps(transcript_json)}"
+
+def prompt_instructions_hash(version=None, fanout=False):
+    """Short hash of the fixed prompt text for a version (all section prompts in fan-out mode)"""
+    if fanout:
+        text = generate_section_context("") + "".join(
+            generate_section_prompt(key) for key in {**SUMMARY_SECTIONS, **SCENE_SECTIONS}
+        )
+    else:
+        text = generate_summary_instructions(version)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+def record_usage(metrics, response):
+    """Add a response's token usage to a metrics dict (no-op when metrics is None)"""
+    if metrics is None:
+        return
+    usage = getattr(response, "usage_metadata", None)
+    with _metrics_lock:
+        for name, field in (("prompt_tokens", "prompt_token_count"),
+                            ("output_tokens", "candidates_token_count"),
+                            ("cached_tokens", "cached_content_token_count")):
+            metrics[name] = metrics.get(name, 0) + (getattr(usage, field, 0) or 0)
+        metrics["requests"] = metrics.get("requests", 0) + 1
+
+def context_cacheable_model(model):
+    """The real Gemini model behind `model` if it supports provider-side caching, else None.
+
+    Recording wrappers expose their inner model; fake models have no caching.
+    """
+    inner = model.model if isinstance(model, RecordingModel) else model
+    return inner if isinstance(inner, genai.GenerativeModel) else None
+
+def below_cache_minimum(text):
+    """True if `text` is too short for Gemini context caching (rough estimate of ~4 characters per token)"""
+    import config
+    return len(text) // 4 < config.GEMINI_MIN_CACHE_TOKENS
+
+def _generate_with_cache(model, cached_model, cached_prompt, full_prompt):
+    """Call a context-cached model; recording wrappers save it under the full prompt so replay matches"""
+    response = cached_model.generate_content(cached_prompt)
+    if isinstance(model, RecordingModel):
+        model.record(full_prompt, response)
+    return response
+
+def get_instruction_cached_model(model, ttl_minutes=60, version=None):
+    """Model bound to a provider-side cache of the instruction prefix, or None if unavailable.
+
+    The cache is looked up by display name first, so processes on every node
+    share one cached prefix per model and prompt version. Prefixes below the
+    minimum cacheable size are skipped without any API call.
+    """
+    version = version or SUMMARY_PROMPT_VERSION
+    key = (model.model_name, version)
+    if key in _context_cached_models:
+        cached_model = _context_cached_models[key]
+        record_cache_event("context_hits" if cached_model else "context_unavailable")
+        return cached_model
+
+    instructions = generate_summary_instructions(version)
+    if below_cache_minimum(instructions):
+        print(f"ℹ️ {version} instruction prefix is below the minimum cacheable size; sending full prompts")
+        record_cache_event("context_unavailable")
+        _context_cached_models[key] = None
+        return None
+
+    display_name = f"ag-vis-{version}-{prompt_instructions_hash(version)}"
     try:
-        response = model.generate_content(prompt)
-        
-        # Try parsing output as JSON
+        cached_content = next(
+            (c for c in caching.CachedContent.list()
+             if c.display_name == display_name and c.model == model.model_name),
+            None
+        )
+        if cached_content:
+            record_cache_event("context_hits")
+        else:
+            cached_content = caching.CachedContent.create(
+                model=model.model_name,
+                display_name=display_name,
+                contents=[instructions],
+                ttl=timedelta(minutes=ttl_minutes)
+            )
+            record_cache_event("context_misses")
+        cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+    except Exception as e:
+        # e.g. the prefix is below the model's minimum cacheable size, or the model has no caching
+        print(f"ℹ️ Context caching unavailable for {model.model_name}: {e}")
+        record_cache_event("context_unavailable")
+        cached_model = None
+
+    _context_cached_models[key] = cached_model
+    return cached_model
+
+def _generate_content(model, variable_part, use_context_cache, ttl_minutes, version=None, metrics=None):
+    """Send the prompt, reusing the cached instruction prefix when the provider supports it"""
+    full_prompt = f"{generate_summary_instructions(version)}\n{variable_part}"
+    cacheable = context_cacheable_model(model) if use_context_cache else None
+    cached_model = get_instruction_cached_model(cacheable, ttl_minutes, version) if cacheable else None
+    if cached_model is not None:
+        try:
+            response = _generate_with_cache(model, cached_model, variable_part, full_prompt)
+            usage = getattr(response, "usage_metadata", None)
+            record_cache_event("context_cached_tokens", getattr(usage, "cached_content_token_count", 0) or 0)
+            record_usage(metrics, response)
+            return response
+        except Exception as e:
+            # Cache expired or was deleted: forget it and send the full prompt this time
+            print(f"ℹ️ Cached instruction prefix not usable ({e}); sending full prompt")
+            _context_cached_models.pop((model.model_name, version or SUMMARY_PROMPT_VERSION), None)
+    response = model.generate_content(full_prompt)
+    record_usage(metrics, response)
+    return response
+
+# Fan-out mode: one smaller request per section, run concurrently
+SECTION_PREAMBLE = """
+        You are an expert educational content analyst and summarizer.
+
+        Analyze the transcript JSON (list of time-stamped text segments) of a lecture for students of Classes 10–12 preparing for JEE and NEET, and produce ONE part of its LMS summary.
+        """
+
+SECTION_STYLE = f"""
+        {VERSION_03_STYLE}
+        """
+
+# key → (instructions, sections it must wait for)
+SUMMARY_SECTIONS = {
+    "overall_summary": ("""
+        "overall_summary" → an object containing:
+            - "summary_title": a short, meaningful title summarizing the entire lecture (student-friendly, suitable as video title).
+            - "summary_text": a 3–4 paragraph overall summary describing the lecture in a clear, engaging tone.
+        """, []),
+    "starting_build_up": ("""
+        "starting_build_up" → describe how the session begins, what motivation or context is given, and what students will learn.
+        """, []),
+    "end_summary": ("""
+        "end_summary" → a concise wrap-up highlighting the final concepts, conclusions, or takeaways.
+        """, []),
+    "chapters": ("""
+        "chapters" → a list of objects, each containing:
+            - "chapter_title"
+            - "start_time"
+            - "end_time"
+            - "summary_text": a natural paragraph summarizing what the chapter covers.
+            - "description"
+        """, []),
+    "tags": ("""
+        "tags" → 8–12 short topic keywords or phrases representing the key concepts.
+        """, []),
+    "Q&A": ("""
+        "Q&A" → 6–10 question–answer pairs that test understanding of the topic.
+        - Include both conceptual and numerical questions.
+        - Include 3–4 numerical or problem-based questions suitable for JEE/NEET.
+        - Answers should be clear and accurate.
+        """, [])
+}
+SCENE_SECTIONS = {
+    "keyframes": ("""
+        "keyframes" → a list of objects with "timestamp" (a scene start_time from the visual scene changes below) and "description" of the key concept, diagram or derivation shown there. Use the chapters below to keep descriptions consistent with the chapter structure.
+        """, ["chapters"])
+}
+
+def parse_json_response(text):
+    """Parse model output as JSON, extracting the outermost object if there is extra text"""
+    try:
+        return json.loads(text)
+    except Exception:
+        cleaned = re.search(r'\{[\s\S]*\}', text)
+        if cleaned:
+            return json.loads(cleaned.group(0))
+    return None
+
+def generate_section_context(transcript_text):
+    """Prefix shared by every section request of one video: role, style and the transcript"""
+    return f"""{SECTION_PREAMBLE}{SECTION_STYLE}
+        Transcript:
+{transcript_text}
+"""
+
+def generate_section_prompt(key, scenes=None, dependencies=None):
+    """Section-specific part of a fan-out request, sent after the shared context"""
+    instructions, _ = {**SUMMARY_SECTIONS, **SCENE_SECTIONS}[key]
+    prompt = f"""
+        Return a JSON object with exactly one key, "{key}":
+        {instructions}"""
+    for name, value in (dependencies or {}).items():
+        prompt += f"\n        Already generated \"{name}\":\n        {json.dumps(value)}\n"
+    if scenes and key in SCENE_SECTIONS:
+        prompt += f"\n{generate_scene_prompt(scenes)}"
+    return prompt
+
+def get_transcript_cached_model(model, context, ttl_minutes=60):
+    """Provider-side cache of one video's transcript context and a model bound to it, or (None, None).
+
+    The cache only lives for one fan-out or prompt-variant run; delete it when that is done.
+    """
+    if below_cache_minimum(context):
+        print("ℹ️ Transcript is below the minimum cacheable size; sending full prompts")
+        record_cache_event("context_unavailable")
+        return None, None
+    display_name = f"ag-vis-sections-{hashlib.sha256(context.encode('utf-8')).hexdigest()[:12]}"
+    try:
+        cached_content = caching.CachedContent.create(
+            model=model.model_name,
+            display_name=display_name,
+            contents=[context],
+            ttl=timedelta(minutes=ttl_minutes)
+        )
+        record_cache_event("context_misses")
+        return cached_content, genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+    except Exception as e:
+        # e.g. the transcript is below the model's minimum cacheable size
+        print(f"ℹ️ Transcript context caching unavailable for {model.model_name}: {e}")
+        record_cache_event("context_unavailable")
+        return None, None
+
+def _generate_section(model, cached_model, key, context, scenes, dependencies, metrics=None):
+    section_prompt = generate_section_prompt(key, scenes, dependencies)
+    response = None
+    if cached_model is not None:
+        try:
+            response = _generate_with_cache(model, cached_model, section_prompt, f"{context}{section_prompt}")
+            usage = getattr(response, "usage_metadata", None)
+            record_cache_event("context_hits")
+            record_cache_event("context_cached_tokens", getattr(usage, "cached_content_token_count", 0) or 0)
+        except Exception as e:
+            print(f"ℹ️ Cached transcript not usable for '{key}' ({e}); sending full prompt")
+    if response is None:
+        response = model.generate_content(f"{context}{section_prompt}")
+    record_usage(metrics, response)
+    parsed = parse_json_response(response.text)
+    if not isinstance(parsed, dict) or key not in parsed:
+        raise ValueError(f"Could not parse section '{key}' from: {response.text[:200]}")
+    return parsed[key]
+
+# Prompt variants: the transcript goes first, so every variant of one video shares it
+def generate_variant_context(variable_part):
+    """Transcript-first prefix shared by all prompt variants of one video"""
+    return f"Transcript:\n{variable_part}\n"
+
+def generate_variant_instructions(version=None):
+    """Instructions of a prompt version, sent after generate_variant_context"""
+    instructions = re.sub(r"\s*Transcript:\s*$", "", generate_summary_instructions(version))
+    return f"{instructions}\n\nThe transcript is given above.\n"
+
+def _generate_after_transcript(model, cached_model, context, version=None, metrics=None):
+    """Send one variant's instructions after the shared transcript, through its cache when there is one"""
+    instructions = generate_variant_instructions(version)
+    if cached_model is not None:
         try:
-            result_json = json.loads(response.text)
-        except Exception:
-            # If direct parsing fails, try to extract JSON
-            cleaned = re.search(r'\{[\s\S]*\}', response.text)
-            if cleaned:
-                result_json = json.loads(cleaned.group(0))
+            response = _generate_with_cache(model, cached_model, instructions, f"{context}{instructions}")
+            usage = getattr(response, "usage_metadata", None)
+            record_cache_event("context_hits")
+            record_cache_event("context_cached_tokens", getattr(usage, "cached_content_token_count", 0) or 0)
+            record_usage(metrics, response)
+            return response
+        except Exception as e:
+            print(f"ℹ️ Cached transcript not usable ({e}); sending full prompt")
+    response = model.generate_content(f"{context}{instructions}")
+    record_usage(metrics, response)
+    return response
+
+def generate_sections_concurrently(transcript_json, model, scenes=None, max_concurrency=4, metrics=None,
+                                   use_context_cache=False, ttl_minutes=60):
+    """Generate each summary section as its own request, `max_concurrency` at a time.
+
+    Sections start as soon as the sections they depend on are done, so wall-clock
+    time approaches the slowest dependency chain instead of the sum of all output.
+    Every request carries the whole transcript, so input tokens grow with the
+    number of sections; with `use_context_cache` the transcript is cached once on
+    the provider side and each section sends only its own instructions.
+    Returns summary_data in the same key order as the single-request mode.
+    """
+    sections = dict(SUMMARY_SECTIONS)
+    if scenes:
+        sections.update(SCENE_SECTIONS)
+    context = generate_section_context(json.dumps(transcript_json))
+    metrics = {} if metrics is None else metrics
+
+    cacheable = context_cacheable_model(model) if use_context_cache else None
+    cached_content, cached_model = (
+        get_transcript_cached_model(cacheable, context, ttl_minutes) if cacheable else (None, None)
+    )
+    try:
+        summary_data = _run_sections(model, cached_model, sections, context, scenes, max_concurrency, metrics)
+    finally:
+        if cached_content is not None:
+            try:
+                cached_content.delete()
+            except Exception as e:
+                print(f"ℹ️ Could not delete cached transcript {cached_content.name}: {e}")
+
+    print(f"📊 Fan-out used {metrics.get('requests', 0)} requests, {metrics.get('prompt_tokens', 0)} prompt tokens "
+          f"({metrics.get('cached_tokens', 0)} from cached context)")
+    return summary_data
+
+def _run_sections(model, cached_model, sections, context, scenes, max_concurrency, metrics):
+    """Submit each section as soon as its dependencies are done and collect the results"""
+    results, errors, running = {}, {}, {}
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        while len(results) + len(errors) < len(sections):
+            for key, (_, depends_on) in sections.items():
+                if key in results or key in errors or key in running.values():
+                    continue
+                if any(dep in errors for dep in depends_on):
+                    errors[key] = f"dependency failed: {', '.join(depends_on)}"
+                elif all(dep in results for dep in depends_on):
+                    dependencies = {dep: results[dep] for dep in depends_on}
+                    future = pool.submit(_generate_section, model, cached_model, key, context, scenes,
+                                         dependencies, metrics)
+                    running[future] = key
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    errors[key] = str(e)
+
+    summary_data = {key: results[key] for key in sections if key in results}
+    if errors:
+        summary_data["error"] = "Some sections failed: " + "; ".join(f"{k}: {v}" for k, v in errors.items())
+    return summary_data
+
+def summary_uses_fanout(prompt_version=None, fanout=None):
+    """Whether generate_summary runs a prompt version in fan-out mode (only version-03 has sections)"""
+    import config
+    fanout = config.SUMMARY_FANOUT_ENABLED if fanout is None else fanout
+    return bool(fanout) and (prompt_version or SUMMARY_PROMPT_VERSION) == SUMMARY_PROMPT_VERSION
+
+def summary_variable_part(transcript_json, scenes=None):
+    """Per-video part of the summary prompt: the transcript and any detected scenes"""
+    variable_part = json.dumps(transcript_json)
+    if scenes:
+        variable_part = f"{variable_part}\n{generate_scene_prompt(scenes)}"
+    return variable_part
+
+def generate_summary(transcript_json, model, api_key, scenes=None, fanout=None, prompt_version=None, metrics=None,
+                     transcript_context=None, transcript_cached_model=None):
+    """Generate summary using Gemini.
+
+    `prompt_version` picks one of SUMMARY_PROMPT_VERSIONS (default version-03);
+    fan-out mode is built on version-03 sections. Token usage and cache hits are
+    added to `metrics` when a dict is given. With a `transcript_context` from
+    generate_variant_context (and optionally a model bound to its cache), the
+    single request puts the transcript first and sends only this version's
+    instructions after it.
+    """
+    import config
+    base_version = prompt_version or SUMMARY_PROMPT_VERSION
+    fanout = summary_uses_fanout(base_version, fanout)
+    prompt_version = f"{base_version}-fanout" if fanout else base_version
+    variable_part = summary_variable_part(transcript_json, scenes)
+    
+    cache = get_summary_cache() if config.SUMMARY_CACHE_ENABLED else None
+    cache_key = summary_cache_key(variable_part, prompt_version, model.model_name,
+                                  prompt_instructions_hash(base_version, fanout))
+    if cache:
+        cached_summary = cache.get(cache_key)
+        if cached_summary:
+            print(f"💾 Summary cache hit ({prompt_version}, {model.model_name})")
+            if metrics is not None:
+                metrics["cache_hit"] = True
+            return cached_summary
+    
+    try:
+        if fanout:
+            result_json = generate_sections_concurrently(transcript_json, model, scenes,
+                                                         config.SUMMARY_FANOUT_CONCURRENCY, metrics,
+                                                         config.GEMINI_TRANSCRIPT_CACHE_ENABLED,
+                                                         config.GEMINI_CONTEXT_CACHE_TTL_MINUTES)
+        else:
+            if transcript_context is not None:
+                response = _generate_after_transcript(model, transcript_cached_model, transcript_context,
+                                                      base_version, metrics)
             else:
+                response = _generate_content(model, variable_part, config.GEMINI_CONTEXT_CACHE_ENABLED,
+                                             config.GEMINI_CONTEXT_CACHE_TTL_MINUTES, base_version, metrics)
+            
+            # Try parsing output as JSON
+            result_json = parse_json_response(response.text)
+            if result_json is None:
                 result_json = {"error": "Could not parse JSON", "raw_output": response.text}
         
+        # Snap chapter boundaries to real transcript segment boundaries
+        if config.CHAPTER_SNAP_ENABLED and isinstance(result_json, dict) and isinstance(result_json.get("chapters"), list):
+            time_index = SegmentTimeIndex.from_transcript(transcript_json)
+            result_json["chapters"] = time_index.snap_chapters(result_json["chapters"])
+        
         # Add metadata
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         enhanced_json = {
@@ -175,6 +595,10 @@ def generate_summary(transcript_json, model, api_key):
             "summary_data": result_json
         }
         
+        # Only well-formed summaries are worth replaying
+        if cache and "error" not in result_json:
+            cache.put(cache_key, enhanced_json)
+        
         return enhanced_json
         
     except Exception as e:
@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+import threading
+from functools import lru_cache
+from utils.artifact_store import atomic_write
+
+# Hit/miss counters for this process: response cache and provider context cache
+CACHE_STATS = {
+    "response_hits": 0,
+    "response_misses": 0,
+    "context_hits": 0,
+    "context_misses": 0,
+    "context_unavailable": 0,
+    "context_cached_tokens": 0
+}
+_stats_lock = threading.Lock()
+
+def record_cache_event(name, amount=1):
+    with _stats_lock:
+        CACHE_STATS[name] += amount
+
+def get_cache_stats():
+    """Snapshot of the cache counters"""
+    with _stats_lock:
+        return dict(CACHE_STATS)
+
+def summary_cache_key(variable_prompt, prompt_version, model_name, instructions_hash=""):
+    """Key a summary on the transcript (plus any extra prompt input), prompt version and model.
+
+    `instructions_hash` covers the prompt text itself, so editing a prompt in
+    place stops old summaries from being served.
+    """
+    digest = hashlib.sha256()
+    for part in (prompt_version, instructions_hash, model_name, variable_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class SummaryCache:
+    """Bounded on-disk cache of generated summaries, evicting least recently used entries"""
+
+    def __init__(self, directory, max_entries=500, max_mb=200):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError):
+            record_cache_event("response_misses")
+            return None
+        record_cache_event("response_hits")
+        return value
+
+    def put(self, key, value):
+        with atomic_write(self._path(key)) as f:
+            json.dump(value, f)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and not name.startswith(".tmp_"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue  # evicted concurrently by another process
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, name = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+@lru_cache(maxsize=None)
+def get_summary_cache():
+    """Return the process-wide summary cache configured in config.py"""
+    import config
+    return SummaryCache(config.SUMMARY_CACHE_DIR, config.SUMMARY_CACHE_MAX_ENTRIES, config.SUMMARY_CACHE_MAX_MB)
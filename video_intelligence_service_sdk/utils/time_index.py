@@ -0,0 +1,130 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+TIMESTAMP_PATTERN = re.compile(r'^(\d+):(\d{2}):(\d{2})(?:\.(\d{1,3}))?$')
+
+def parse_timestamp(timestamp: str) -> int:
+    """Convert an HH:MM:SS.mmm timestamp to integer milliseconds"""
+    match = TIMESTAMP_PATTERN.match(timestamp.strip())
+    if not match:
+        raise ValueError(f"Invalid timestamp: {timestamp}")
+    hours, minutes, seconds, millis = match.groups()
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int((millis or "0").ljust(3, "0"))
+
+def format_timestamp_ms(ms: int) -> str:
+    """Convert integer milliseconds to an HH:MM:SS.mmm timestamp"""
+    seconds, millis = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+
+def nearest_value(values, t_ms):
+    """Value in the sorted list `values` closest to t_ms (t_ms itself if the list is empty)"""
+    i = bisect_left(values, t_ms)
+    neighbours = [values[j] for j in (i - 1, i) if 0 <= j < len(values)]
+    return min(neighbours, key=lambda v: abs(v - t_ms)) if neighbours else t_ms
+
+class SegmentTimeIndex:
+    """Time index over transcript segments for O(log n) lookups.
+
+    Segments are kept sorted by start time as integer-ms arrays. A running
+    maximum of end times makes overlap queries correct even if segments overlap.
+    """
+
+    def __init__(self, audio_segments):
+        segments = sorted(audio_segments, key=lambda s: parse_timestamp(s["start_time"]))
+        self.segments = segments
+        self.starts = [parse_timestamp(s["start_time"]) for s in segments]
+        self.ends = [parse_timestamp(s["end_time"]) for s in segments]
+        self.max_ends = list(accumulate(self.ends, max))
+        self.sorted_ends = sorted(self.ends)
+
+    @classmethod
+    def from_transcript(cls, transcript_json):
+        return cls(transcript_json.get("audio_segments", []))
+
+    def __len__(self):
+        return len(self.segments)
+
+    def overlapping(self, start_ms, end_ms):
+        """Segments overlapping [start_ms, end_ms), in start order"""
+        first = bisect_right(self.max_ends, start_ms)  # earlier segments all end before start_ms
+        last = bisect_left(self.starts, end_ms)  # later segments all start at/after end_ms
+        return [self.segments[i] for i in range(first, last) if self.ends[i] > start_ms]
+
+    def segment_at(self, t_ms):
+        """The segment playing at t_ms, or None if t_ms falls in a gap"""
+        i = bisect_right(self.starts, t_ms) - 1
+        while i >= 0 and self.max_ends[i] > t_ms:
+            if self.ends[i] > t_ms:
+                return self.segments[i]
+            i -= 1
+        return None
+
+    def text_between(self, start_ms, end_ms):
+        """Transcript text of all segments overlapping [start_ms, end_ms)"""
+        return " ".join(s["transcript"] for s in self.overlapping(start_ms, end_ms))
+
+    def snap_start(self, t_ms):
+        """Nearest real segment start to t_ms"""
+        return nearest_value(self.starts, t_ms)
+
+    def snap_end(self, t_ms):
+        """Nearest real segment end to t_ms"""
+        return nearest_value(self.sorted_ends, t_ms)
+
+    def segment_id_range(self, start_ms, end_ms):
+        """[first id, last id] of the segments overlapping [start_ms, end_ms), or None"""
+        spanned = self.overlapping(start_ms, end_ms)
+        return [spanned[0].get("id"), spanned[-1].get("id")] if spanned else None
+
+    @staticmethod
+    def _chapter_times(chapter):
+        try:
+            return parse_timestamp(chapter["start_time"]), parse_timestamp(chapter["end_time"])
+        except (TypeError, KeyError, ValueError, AttributeError):
+            return None
+
+    def snap_chapters(self, chapters):
+        """Snap LLM chapter boundaries to segment boundaries and record the segment id range they span.
+
+        A boundary shared by consecutive chapters is snapped once (to a segment
+        start), so adjacent chapters never overlap. Chapters that are not objects
+        or have unparsable times are returned unchanged.
+        """
+        times = [self._chapter_times(chapter) for chapter in chapters]
+        snapped = []
+        for i, chapter in enumerate(chapters):
+            if times[i] is None:
+                snapped.append(chapter)
+                continue
+            start, end = times[i]
+            following = times[i + 1] if i + 1 < len(times) else None
+            start_ms = self.snap_start(start)
+            shared_end = following is not None and following[0] == end
+            end_ms = self.snap_start(end) if shared_end else self.snap_end(end)
+            chapter = dict(chapter)
+            if end_ms > start_ms:
+                chapter["start_time"] = format_timestamp_ms(start_ms)
+                chapter["end_time"] = format_timestamp_ms(end_ms)
+                segment_id_range = self.segment_id_range(start_ms, end_ms)
+                if segment_id_range:
+                    chapter["segment_id_range"] = segment_id_range
+            snapped.append(chapter)
+        return snapped
+
+@lru_cache(maxsize=128)
+def _load_time_index(json_file, version):
+    from utils.json_processing import load_json
+    return SegmentTimeIndex.from_transcript(load_json(json_file))
+
+def load_time_index(json_file):
+    """Shared, cached time index for a transcript JSON artifact (rebuilt when it changes).
+
+    Resolved through the artifact store, so compressed and S3 transcripts work;
+    raises FileNotFoundError if there is no such transcript.
+    """
+    from utils.artifact_store import json_artifact_version, get_artifact_compression
+    return _load_time_index(json_file, json_artifact_version(json_file, compression=get_artifact_compression()))
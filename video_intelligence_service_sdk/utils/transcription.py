@@ -36,6 +36,7 @@ from faster_whisper import WhisperModel
 import os
 import psutil  # For system memory info
 import traceback
+from utils.artifact_store import atomic_write, publish_artifact
 
 def format_timestamp(seconds: float) -> str:
     hours = int(seconds // 3600)
@@ -51,7 +52,9 @@ def estimate_model_memory(model_size: str) -> float:
         "base": 0.5,
         "small": 1.2,
         "medium": 2.6,
-        "large-v2": 5.5
+        "large": 5.5,
+        "large-v2": 5.5,
+        "large-v3": 5.5
     }
     return estimates.get(model_size, 1.0)
 
@@ -69,6 +72,18 @@ def log_memory_status(model_size: str):
     else:
         print("✅ Memory seems sufficient for this model.")
 
+def load_whisper_model(model_size: str, num_workers: int = 1):
+    """Load a faster-whisper model on CPU with int8 precision.
+
+    `num_workers` > 1 lets that many threads decode concurrently on the same weights.
+    """
+    print(f"\n🚀 Loading model '{model_size}' on CPU (int8 precision)...")
+    return WhisperModel(model_size, device="cpu", compute_type="int8", num_workers=num_workers)
+
+def format_vtt_cue(index: int, start: float, end: float, text: str) -> str:
+    """Format a single numbered VTT cue block"""
+    return f"{index}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text.strip()}\n\n"
+
 def transcribe_video_to_vtt(video_path, output_vtt, model_size="small"):
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video file not found: {video_path}")
@@ -80,20 +95,18 @@ def transcribe_video_to_vtt(video_path, output_vtt, model_size="small"):
     log_memory_status(model_size)
 
     try:
-        print(f"\n🚀 Loading model '{model_size}' on CPU (int8 precision)...")
-        model = WhisperModel(model_size, device="cpu", compute_type="int8")
+        model = load_whisper_model(model_size)
 
         print(f"🎧 Transcribing video: {video_path}")
         segments, info = model.transcribe(video_path)
 
         print(f"🌐 Detected language: {info.language}, Probability: {info.language_probability:.2f}")
 
-        with open(output_vtt, "w", encoding="utf-8") as vtt:
+        with atomic_write(output_vtt) as vtt:
             vtt.write("WEBVTT\n\n")
             for i, segment in enumerate(segments, start=1):
-                start = format_timestamp(segment.start)
-                end = format_timestamp(segment.end)
-                vtt.write(f"{i}\n{start} --> {end}\n{segment.text.strip()}\n\n")
+                vtt.write(format_vtt_cue(i, segment.start, segment.end, segment.text))
+        publish_artifact(output_vtt)
 
         print(f"\n✅ Subtitles saved as {output_vtt}")
         return output_vtt
@@ -0,0 +1,105 @@
+import os
+import time
+import socket
+import threading
+import traceback
+from functools import lru_cache
+from utils.admission import transcribe_with_admission
+from utils.json_processing import vtt_to_json, save_json, load_json
+from utils.summarization import initialize_gemini, generate_summary
+
+STAGES = ["transcribe", "summarize"]
+
+@lru_cache(maxsize=None)
+def _gemini_model(api_key):
+    return initialize_gemini(api_key)
+
+def run_transcribe_stage(payload):
+    """MP4 → VTT → transcript JSON; hands the transcript on to the summarize stage"""
+    import config
+    video_file = payload["video_path"]
+    base_name = payload.get("base_name") or os.path.splitext(os.path.basename(video_file))[0]
+    vtt_file = os.path.join(config.OUTPUT_FOLDER, base_name + ".vtt")
+    json_file = os.path.join(config.OUTPUT_FOLDER, base_name + ".json")
+
+    if not transcribe_with_admission(video_file, vtt_file):
+        raise RuntimeError(f"Transcription failed for {video_file}")
+    save_json(vtt_to_json(vtt_file), json_file)
+
+    result = {"vtt_file": vtt_file, "json_file": json_file}
+    return result, [("summarize", {"json_file": json_file, "base_name": base_name})]
+
+def run_summarize_stage(payload):
+    """Transcript JSON → summary JSON"""
+    import config
+    summary = generate_summary(load_json(payload["json_file"]), _gemini_model(config.GEMINI_API_KEY),
+                               config.GEMINI_API_KEY)
+    if "error" in summary:
+        raise RuntimeError(summary["error"])
+
+    summary_file = os.path.join(config.OUTPUT_FOLDER, f"summary_{payload['base_name']}.json")
+    save_json(summary, summary_file)
+    return {"summary_file": summary_file}, []
+
+STAGE_HANDLERS = {
+    "transcribe": run_transcribe_stage,
+    "summarize": run_summarize_stage
+}
+
+def enqueue_videos(queue, video_paths, max_attempts=3):
+    """Add one transcribe job per video; summaries follow automatically"""
+    job_ids = []
+    for video_path in video_paths:
+        job_ids.append(queue.enqueue("transcribe", {"video_path": os.path.abspath(video_path)}, max_attempts))
+        print(f"📥 Queued: {video_path}")
+    return job_ids
+
+def _keep_lease(queue, job_id, worker_id, lease_seconds, stop, lost):
+    while not stop.wait(lease_seconds / 3):
+        if not queue.heartbeat(job_id, worker_id, lease_seconds):
+            lost.set()
+            return
+
+def run_worker(queue, stages=None, worker_id=None, lease_seconds=120, poll_seconds=5.0, exit_when_idle=False):
+    """Pull and run jobs for `stages` until stopped.
+
+    Start transcribe-only workers on CPU-heavy nodes and summarize-only workers
+    on lightweight ones; any number of workers can share one queue.
+    """
+    stages = stages or STAGES
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    print(f"👷 Worker {worker_id} serving stages: {', '.join(stages)}")
+
+    processed = 0
+    while True:
+        job = queue.claim(worker_id, stages, lease_seconds)
+        if job is None:
+            if exit_when_idle:
+                print(f"💤 Queue empty, worker exiting after {processed} job(s)")
+                return processed
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"\n🔄 [{job['stage']}] job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+        stop, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=_keep_lease,
+                                     args=(queue, job["id"], worker_id, lease_seconds, stop, lost), daemon=True)
+        heartbeat.start()
+        started = time.time()
+        try:
+            result, next_jobs = STAGE_HANDLERS[job["stage"]](job["payload"])
+            stop.set()
+            heartbeat.join()
+            # A stolen job is finished by its new owner; don't report results for it
+            if not lost.is_set() and queue.complete(job["id"], worker_id, result, next_jobs):
+                print(f"✅ [{job['stage']}] job {job['id']} done in {time.time() - started:.1f}s")
+            else:
+                print(f"⚠️ Lost the lease on job {job['id']}; another worker owns it now")
+        except Exception:
+            stop.set()
+            heartbeat.join()
+            error = traceback.format_exc()
+            print(f"❌ [{job['stage']}] job {job['id']} failed:\n{error}")
+            if not lost.is_set():
+                queue.fail(job["id"], worker_id, error)
+        processed += 1